@@ -11,6 +11,15 @@ Classes
 -------
 Float32Encoder : json.JSONEncoder
     A JSON encoder for encoding floats to 8 decimal places with optimized performance.
+
+Float arrays are rounded as a whole with numpy (vectorized mode, the
+default). Values that sit on a rounding tie after scaling, or that are
+too large to scale exactly, fall back to the `Decimal` path, so both
+modes produce identical output.
+
+`iterencode` (and therefore `json.dump` and `Float32Encoder.dump`) walks
+the object lazily and emits the JSON text in chunks, without building a
+processed copy of the object or the full string.
 """
 
 import json
@@ -20,6 +29,7 @@ from decimal import (
     ROUND_HALF_EVEN, 
     DecimalException
 )
+from csa_common_lib.helpers._arrays import ArrayReference
 
 
 class Float32Encoder(json.JSONEncoder):
@@ -35,18 +45,26 @@ class Float32Encoder(json.JSONEncoder):
     ----------
     quantize_exp : Decimal
         Decimal object representing the precision for truncation to 8 decimal places.
+    vectorized : bool
+        Round float32/float64 ndarrays as a whole instead of element by element.
 
     Methods
     -------
     _truncate(x):
         Truncates a float to 8 decimal places using a predefined decimal precision.
+    _truncate_array(arr):
+        Truncates a float ndarray to 8 decimal places in one vectorized pass.
     _process(obj):
         Recursively processes nested objects, applying truncation to all float values.
     encode(obj):
         Encodes a JSON object with processed float values to 8 decimal places.
+    iterencode(obj):
+        Lazily encodes a JSON object chunk by chunk.
+    dump(obj, fp):
+        Writes the encoded JSON object to a file-like object chunk by chunk.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, vectorized=True, **kwargs):
         """
         Initializes the encoder with a pre-compiled decimal precision context.
 
@@ -58,11 +76,20 @@ class Float32Encoder(json.JSONEncoder):
         ----------
         *args : tuple
             Positional arguments passed to the parent JSONEncoder.
+        vectorized : bool, optional
+            Round float ndarrays as a whole with numpy, by default True.
+            False processes every element through the Decimal path.
         **kwargs : dict
             Keyword arguments passed to the parent JSONEncoder.
         """
         super().__init__(*args, **kwargs)
         self.quantize_exp = Decimal('0.00000000')  # Pre-compiled for 8-decimal precision
+        self.vectorized = vectorized
+
+        # Plain encoder for blocks of already truncated floats (C-accelerated)
+        self._block_encoder = json.JSONEncoder(
+            separators=(self.item_separator, self.key_separator)
+        )
 
 
     def _truncate(self, x):
@@ -97,6 +124,55 @@ class Float32Encoder(json.JSONEncoder):
             return x  # Return original value if there's an exception
 
 
+    def _truncate_array(self, arr):
+        """
+        Truncates a float ndarray to 8 decimal places in one vectorized pass.
+
+        Values are scaled by 1e8, rounded half to even with `np.rint` and scaled
+        back, which yields the same float as the Decimal path. The only values
+        where the scaled product can round differently are those within a few
+        ulps of a rounding tie, or too large to scale exactly; these few values
+        are sent through `_truncate` instead.
+
+        NaN and Infinity are replaced with None (which serializes as null).
+
+        Parameters
+        ----------
+        arr : np.ndarray
+            float32 or float64 array to truncate.
+
+        Returns
+        -------
+        list
+            Nested list of truncated floats with the shape of the array.
+        """
+
+        values = np.asarray(arr, dtype=np.float64)
+        finite = np.isfinite(values)
+
+        with np.errstate(all='ignore'):
+            scaled = values * 1e8
+            rounded = np.rint(scaled) / 1e8
+
+            # Values the scaled product cannot round exactly
+            distance_to_tie = np.abs(scaled - np.floor(scaled) - 0.5)
+            suspect = finite & (
+                (distance_to_tie <= 4 * np.spacing(np.abs(scaled)))
+                | (np.abs(scaled) >= 2**52)
+            )
+
+        for index in np.flatnonzero(suspect):
+            rounded.flat[index] = self._truncate(values.flat[index])
+
+        if finite.all():
+            return rounded.tolist()
+
+        # Replace NaN or Infinity with None
+        rounded = rounded.astype(object)
+        rounded[~finite] = None
+        return rounded.tolist()
+
+
     def _process(self, obj):
         """
         Processes an object by truncating all float values within nested structures.
@@ -108,7 +184,8 @@ class Float32Encoder(json.JSONEncoder):
         Parameters
         ----------
         obj : any
-            The object to process. This can be a float, list, dictionary, or numpy array.
+            The object to process. This can be a float, list, dictionary, numpy array
+            or array reference (resolved into its array).
 
         Returns
         -------
@@ -122,8 +199,14 @@ class Float32Encoder(json.JSONEncoder):
             return self._truncate(obj)
         elif obj_type == dict:
             return {k: self._process(v) for k, v in obj.items()}
-        elif obj_type in (list, np.ndarray):
+        elif (obj_type == np.ndarray and self.vectorized
+              and obj.dtype in (np.float32, np.float64)):
+            return self._truncate_array(obj)
+        elif obj_type in (list, tuple, np.ndarray):
             return [self._process(x) for x in obj]
+        elif isinstance(obj, ArrayReference):
+            # Lazy array (e.g. a cov_inv reference): encode the array
+            return self._process(obj.resolve())
         return obj
 
     def encode(self, obj):
@@ -143,4 +226,223 @@ class Float32Encoder(json.JSONEncoder):
         str
             JSON-encoded string with truncated float values.
         """
-        return super().encode(self._process(obj))
\ No newline at end of file
+        return super().encode(self._process(obj))
+
+
+    def iterencode(self, obj, _one_shot=False):
+        """
+        Lazily encodes an object as JSON, yielding the text chunk by chunk.
+
+        Nested dicts, lists and tuples are walked as they are encoded, and float
+        ndarrays are rounded and encoded in blocks of rows, so neither a processed
+        copy of the object nor the full JSON string is materialized. This is the
+        method used by `json.dump(obj, fp, cls=Float32Encoder)`.
+
+        Parameters
+        ----------
+        obj : any
+            The object to encode, which may contain nested structures with float values.
+
+        Yields
+        ------
+        str
+            Chunks of the JSON-encoded string with truncated float values.
+        """
+
+        # encode() has already processed the object, use the C encoder
+        if _one_shot:
+            return super().iterencode(obj, _one_shot)
+
+        # The lazy walker does not support indentation
+        if self.indent is not None:
+            return super().iterencode(self._process(obj))
+
+        markers = {} if self.check_circular else None
+        return self._iterencode(obj, markers)
+
+
+    def _iterencode(self, obj, markers):
+        """
+        Lazy JSON walker behind `iterencode`.
+
+        Parameters
+        ----------
+        obj : any
+            The object to encode.
+        markers : dict or None
+            Ids of the containers being encoded, to detect circular references.
+
+        Yields
+        ------
+        str
+            Chunks of the JSON-encoded string.
+        """
+
+        if isinstance(obj, str):
+            if self.ensure_ascii:
+                yield json.encoder.encode_basestring_ascii(obj)
+            else:
+                yield json.encoder.encode_basestring(obj)
+        elif obj is None:
+            yield 'null'
+        elif obj is True:
+            yield 'true'
+        elif obj is False:
+            yield 'false'
+        elif isinstance(obj, (float, np.float32, np.float64)):
+            value = self._truncate(obj)
+            yield 'null' if value is None else float.__repr__(float(value))
+        elif isinstance(obj, int):
+            yield int.__repr__(obj)
+        elif isinstance(obj, np.ndarray) and self.vectorized and obj.dtype in (np.float32, np.float64):
+            yield from self._iterencode_array(obj)
+        elif isinstance(obj, np.ndarray):
+            yield '['
+            for index, value in enumerate(obj):
+                if index:
+                    yield self.item_separator
+                yield from self._iterencode(value, markers)
+            yield ']'
+        elif isinstance(obj, (list, tuple, dict)):
+            if markers is not None:
+                if id(obj) in markers:
+                    raise ValueError("Circular reference detected")
+                markers[id(obj)] = obj
+
+            if isinstance(obj, dict):
+                yield from self._iterencode_dict(obj, markers)
+            else:
+                yield '['
+                for index, value in enumerate(obj):
+                    if index:
+                        yield self.item_separator
+                    yield from self._iterencode(value, markers)
+                yield ']'
+
+            if markers is not None:
+                del markers[id(obj)]
+        elif isinstance(obj, ArrayReference):
+            # Lazy array (e.g. a cov_inv reference): encode the array
+            yield from self._iterencode(obj.resolve(), markers)
+        else:
+            yield from self._iterencode(self.default(obj), markers)
+
+
+    def _iterencode_dict(self, obj, markers):
+        """
+        Encodes the items of a dictionary for `_iterencode`, following the key
+        conventions of `json.JSONEncoder` (str, int, float, bool and None keys).
+        """
+
+        yield '{'
+        items = sorted(obj.items()) if self.sort_keys else obj.items()
+        first = True
+        for key, value in items:
+            if isinstance(key, str):
+                pass
+            elif isinstance(key, float):
+                key = float.__repr__(key)
+            elif key is True:
+                key = 'true'
+            elif key is False:
+                key = 'false'
+            elif key is None:
+                key = 'null'
+            elif isinstance(key, int):
+                key = int.__repr__(key)
+            elif self.skipkeys:
+                continue
+            else:
+                raise TypeError(f'keys must be str, int, float, bool or None, not {key.__class__.__name__}')
+
+            if not first:
+                yield self.item_separator
+            first = False
+
+            yield from self._iterencode(key, markers)
+            yield self.key_separator
+            yield from self._iterencode(value, markers)
+        yield '}'
+
+
+    def _iterencode_array(self, arr, block_size=65536):
+        """
+        Encodes a float ndarray for `_iterencode`. Blocks of about block_size
+        elements are rounded with `_truncate_array` and encoded with the C
+        encoder, one block at a time.
+        """
+
+        if arr.ndim == 0:
+            yield from self._iterencode(arr.item(), None)
+        elif arr.ndim > 2:
+            yield '['
+            for index, sub_array in enumerate(arr):
+                if index:
+                    yield self.item_separator
+                yield from self._iterencode_array(sub_array, block_size)
+            yield ']'
+        else:
+            # Blocks of elements (1d) or of whole rows (2d)
+            row_size = arr[0].size if arr.ndim == 2 and arr.shape[0] else 1
+            step = max(1, block_size // max(row_size, 1))
+
+            yield '['
+            for start in range(0, arr.shape[0], step):
+                if start:
+                    yield self.item_separator
+                block = self._truncate_array(arr[start:start + step])
+                yield self._block_encoder.encode(block)[1:-1]
+            yield ']'
+
+
+    def dump(self, obj, fp):
+        """
+        Writes the processed object as JSON to a file-like object.
+
+        The JSON text is written chunk by chunk as it is produced, so the full
+        string is never held in memory.
+
+        Parameters
+        ----------
+        obj : any
+            The object to encode, which may contain nested structures with float values.
+        fp : file-like object
+            Writable text stream (e.g. an open file or `io.StringIO`).
+        """
+        for chunk in self.iterencode(obj):
+            fp.write(chunk)
+
+
+if __name__ == "__main__":
+    import io
+    import time
+
+    # Parity: vectorized and Decimal paths must produce identical JSON
+    rng = np.random.default_rng(0)
+    samples = [
+        rng.standard_normal((200, 50)),
+        rng.standard_normal((200, 50)).astype(np.float32),
+        rng.integers(-10**6, 10**6, 10_000) / 2**9, # exact rounding ties
+        np.array([0.0, -0.0, 1e-9, -1e-9, 5e-9, 1e15, 1e20, 1e300, -1e308,
+                  np.nan, np.inf, -np.inf, 0.123456785, 2.5e-8]),
+    ]
+    for sample in samples:
+        vectorized = json.dumps(sample, cls=Float32Encoder)
+        reference = json.dumps(sample, cls=Float32Encoder, vectorized=False)
+        assert vectorized == reference, "Vectorized output differs from the Decimal path."
+    print("Parity check passed.")
+
+    # Streaming output must match encode()
+    payload = {'yhat': 1.123456789, 'details': [{'weights': samples[0], 'fit': np.float32(0.5)},
+                                               (1, 2.000000004, None, True, 'text')]}
+    stream = io.StringIO()
+    Float32Encoder().dump(payload, stream)
+    assert stream.getvalue() == Float32Encoder().encode(payload), "Streaming output differs from encode()."
+    print("Streaming check passed.")
+
+    # Benchmark: 10k x 100 weights matrix
+    weights = rng.standard_normal((10_000, 100))
+    for vectorized in (False, True):
+        start_time = time.perf_counter()
+        Float32Encoder(vectorized=vectorized).dump({'weights': weights}, io.StringIO())
+        print(f"vectorized={vectorized}: {time.perf_counter() - start_time:.2f}s")
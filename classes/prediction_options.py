@@ -1,6 +1,7 @@
 import copy
 import numpy as np
 from random import getrandbits
+from csa_common_lib.toolbox.stats.covariance import resolve_cov_inv
 
 
 # Grid object keys valid for _retain_grid_objects when passed as a list.
@@ -51,8 +52,10 @@ class PredictionOptions(metaclass=_OptionsMeta):
         Specify evaluation censor type, relevance, similarity, or both.
     adj_fit_multiplier : str, optional (default='K')
         Adjusted fit multiplier. Specify either 'log', 'K', or '1'.
-    cov_inv : ndarray [K-by-K], optional (default=None)
-        Inverse covariance matrix, specify for speed.
+    cov_inv : ndarray [K-by-K] or CovInvReference, optional (default=None)
+        Inverse covariance matrix, specify for speed. A CovInvReference
+        (see toolbox.stats.covariance.CovInvProvider) keeps the matrix
+        out of the payload and is resolved on access.
     verify_missing_data : bool, optional (default=False)
         Verify missing data in the input data.
     inv_method : str, optional (default='gaussian')
@@ -102,6 +105,9 @@ class PredictionOptions(metaclass=_OptionsMeta):
 
         # Check if 'options' is in self.__dict__ to avoid KeyError
         if 'options' in self.__dict__ and name in self.__dict__['options']:
+            # cov_inv may be a lazy CovInvReference, resolved on access
+            if name == 'cov_inv':
+                return resolve_cov_inv(self.__dict__['options'][name])
             return self.__dict__['options'][name]
 
         # Raise an AttributeError if the attribute is not found
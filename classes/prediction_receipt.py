@@ -1,11 +1,22 @@
 import numpy as np
-import pickle
 import json
 import uuid
 from datetime import datetime
 from random import getrandbits
-from csa_common_lib.helpers._conversions import convert_ndarray_to_list
-from csa_common_lib.helpers._os import is_valid_path, calc_crc64
+from csa_common_lib.helpers._conversions import (
+    ARRAY_REFERENCE_TO_LIST,
+    DATETIME_TO_STRING,
+    NDARRAY_TO_LIST,
+    SERIES_TO_LIST,
+    convert_ndarray_to_list,
+    transform_tree
+)
+from csa_common_lib.helpers._os import is_valid_path, calc_array_checksum
+from csa_common_lib.toolbox.columnar.io_operations import load_columnar, save_to_columnar
+
+# Leaf rules making a receipt JSON serializable
+JSON_RULES = [NDARRAY_TO_LIST, ARRAY_REFERENCE_TO_LIST, SERIES_TO_LIST, DATETIME_TO_STRING]
+
 
 class PredictionReceipt:
     """Saves and orgnaizes input dimensions, prediction durations, 
@@ -36,9 +47,9 @@ class PredictionReceipt:
         self.theta_dim = theta.shape  # Save input dimensions
         self.options = convert_ndarray_to_list(options.options) # Save input options
         self.yhat = yhat # Save output info
-        self.y_checksum = calc_crc64(pickle.dumps(y)) # convert y to bytes and get checksum
-        self.X_checksum = calc_crc64(pickle.dumps(X)) # convert X to bytes and get checksum
-        self.theta_checksum = calc_crc64(pickle.dumps(theta)) # convert theta to bytes and get checksum
+        self.y_checksum = calc_array_checksum(y) # checksum of the y buffer, shape and dtype
+        self.X_checksum = calc_array_checksum(X) # checksum of the X buffer, shape and dtype
+        self.theta_checksum = calc_array_checksum(theta) # checksum of the theta buffer, shape and dtype
         self.seed = getattr(options, '_seed', "A seed was not set") # The np.random seed cannot be accessed via os calls. Referencing options instead. 
 
     def display(self, detail:bool=False):
@@ -72,16 +83,63 @@ class PredictionReceipt:
         except (FileNotFoundError, PermissionError) as e:
             print(f"Error: {e}")
 
-        # Convert any nd.arrays to lists (to be json serializable)
-        for attr in dir(self):
-            attr_value = getattr(self, attr)
-            if isinstance(attr_value, np.ndarray):
-                setattr(self, attr, attr_value.tolist())
-        
-        
-        # Turn receipt object into dictionary so that it can be saved as a json file
-        obj_dict = self.__dict__
+        # Turn receipt object into a JSON serializable dictionary in one pass
+        # (nd.arrays, array references and Series to lists, datetimes to strings)
+        obj_dict = transform_tree(self.__dict__, JSON_RULES)
+
+        # Encode before opening the file, so a failure leaves no partial .json
+        json_str = json.dumps(obj_dict)
 
         # Save to a JSON file
         with open(f'{path}{file_name}.json', 'w') as json_file:
-            json.dumps(obj_dict, json_file)
\ No newline at end of file
+            json_file.write(json_str)
+
+
+    def save_columnar(self, path:str='', file_name:str=None, compression=None):
+        """Saves prediction_receipts as a binary columnar .csac file. 
+        ndarray attributes (e.g. yhat) are stored as typed columns, the
+        other attributes in the file header.
+        """
+
+        # Convert timestamp to filename if not supplied
+        if file_name is None:
+            file_name = self.timestamp.replace(" ", "_").replace(":", "-")
+
+        # Validate that the user supplied a valid path before saving
+        try:
+            if path != '':
+                is_valid_path(path)
+        except (FileNotFoundError, PermissionError) as e:
+            print(f"Error: {e}")
+
+        # Split typed arrays from the rest of the receipt
+        columns = {
+            attr: value for attr, value in self.__dict__.items()
+            if isinstance(value, np.ndarray) and not value.dtype.hasobject
+        }
+        meta = transform_tree(
+            {attr: value for attr, value in self.__dict__.items() if attr not in columns},
+            JSON_RULES
+        )
+
+        return save_to_columnar(f'{path}{file_name}', meta=meta,
+                                compression=compression, **columns)
+
+
+    @classmethod
+    def load_columnar(cls, file_path:str, mmap:bool=True):
+        """Loads a receipt saved with save_columnar.
+        """
+
+        data, meta = load_columnar(file_path, mmap=mmap)
+
+        receipt = cls.__new__(cls)
+        receipt.__dict__.update(meta)
+        receipt.__dict__.update(data)
+
+        # Input dimensions are stored as lists
+        for attr in ('X_dim', 'y_dim', 'theta_dim'):
+            if isinstance(receipt.__dict__.get(attr), list):
+                setattr(receipt, attr, tuple(getattr(receipt, attr)))
+
+        return receipt
@@ -1,4 +1,10 @@
 import numpy as np
+from csa_common_lib.toolbox.columnar.io_operations import (
+    load_columnar,
+    pack_records,
+    save_to_columnar,
+    unpack_records
+)
 
 class PredictionResults:
     """Stores an array of dictionaries containing prediction results
@@ -16,24 +22,31 @@ class PredictionResults:
         If items in raw_data are not dictionaries.
     """    
     
+    # Results keys are not instance attributes: they are materialized on
+    # first access by __getattr__ and cached in _values. Attributes set
+    # explicitly (e.g. yhat = None) are also tracked in _overrides
+    __slots__ = ('raw_data', '_keys', '_columns', '_values', '_overrides')
+
 
     def __init__(self, results):
         if not results:
             raise ValueError("PredictionResults: Input data cannot be empty.")
 
-        self.raw_data = results if isinstance(results, list) else [results]
+        # Own the list, so that append/extend do not modify the caller's list
+        self.raw_data = list(results) if isinstance(results, list) else [results]
         self._initialize_attributes()
 
-        # compute weights concentration and add to class
-        if hasattr(self, 'weights'):
-            self.weights_concentration = [np.std(row) for row in self.weights]
-
-        if hasattr(self,'status') and hasattr(self,'error'):
+        if 'status' in self._keys and 'error' in self._keys:
             self.yhat = None
             print("Warning: Some attributes are missing in the results. Tasks may have failed.")
 
 
     def _initialize_attributes(self):
+        self._keys = []
+        self._columns = {}
+        self._values = {}
+        self._overrides = set()
+
         if not self.raw_data:
             return
         
@@ -47,18 +60,311 @@ class PredictionResults:
             raise TypeError("PredictionResults: Items in raw_data must be dictionaries")
         
         # keys_to_populate = [key for key in first_item if key in allowed_keys]
-        allowed_keys = list(self.raw_data[0].keys()) # Pull results keys that we want to capture
-
-        for key in allowed_keys:
-            values = []
-            for item in self.raw_data:
-                if key in item:
-                    value = item[key]
-                    if isinstance(value, np.ndarray) and value.shape == (1, 1):
-                        value = value[0][0]
-                    values.append(value)
-            setattr(self, key, values)
-            
+        self._keys = list(self.raw_data[0].keys()) # Pull results keys that we want to capture
+
+
+    def __getattr__(self, name):
+        """Materializes a results key on first access. Homogeneous per-task
+        arrays are stacked into one column (see column), and the attribute
+        is the list of per-task values.
+        """
+
+        # Slots that are not set yet (e.g. while unpickling)
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        if name not in self._values:
+            if name in self._keys:
+                self._values[name] = _column_values(self._get_column(name))
+            elif name == 'weights_concentration' and 'weights' in self._keys:
+                self._values[name] = self._weights_concentration()
+            else:
+                raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        return self._values[name]
+
+
+    def __setattr__(self, name, value):
+        if name in PredictionResults.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            self._values[name] = value
+            self._overrides.add(name)
+
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(self.attributes()))
+
+
+    def __getstate__(self):
+        """Pickled state: raw_data and the attributes set explicitly, in
+        the {'raw_data': ..., <attr>: ...} layout of the former class.
+        Materialized columns are not pickled, they are rebuilt on access.
+        """
+        state = {name: self._values[name] for name in self._overrides if name in self._values}
+        state['raw_data'] = self.raw_data
+        return state
+
+
+    def __setstate__(self, state:dict):
+        """Restores pickled results, including results pickled before the
+        attributes were materialized lazily: their state also holds every
+        results key (and weights_concentration) as a list of values. These
+        lists are dropped and rebuilt lazily from raw_data, other entries
+        (e.g. yhat = None of failed tasks) are restored as set attributes.
+        """
+
+        object.__setattr__(self, 'raw_data', state['raw_data'])
+        self._initialize_attributes()
+
+        derived = set(self._keys)
+        if 'weights' in derived:
+            derived.add('weights_concentration')
+
+        for name, value in state.items():
+            if name == 'raw_data' or (name in derived and isinstance(value, list)):
+                continue
+            setattr(self, name, value)
+
+
+    def to_dict(self):
+        """Returns the results as a dictionary of attributes, as saved by
+        save_to_npz: raw_data, the list of values of every results key
+        (built from raw_data, without materializing the columns) and the
+        attributes set explicitly or already materialized.
+
+        Returns
+        -------
+        dict
+            Attribute values by name.
+        """
+
+        attributes = {'raw_data': self.raw_data}
+        for key in self._keys:
+            attributes[key] = _unwrap_scalars([item[key] for item in self.raw_data if key in item])
+        attributes.update(self._values)
+        return attributes
+
+
+    def release(self, key:str=None):
+        """Drops the cached column and values of a results key to free
+        memory. They are rebuilt from raw_data on next access.
+
+        Parameters
+        ----------
+        key : str, optional
+            Results key to release, by default None (all keys).
+        """        
+
+        keys = list(self._values) + list(self._columns) if key is None else [key]
+        for key in keys:
+            self._columns.pop(key, None)
+            self._values.pop(key, None)
+            self._overrides.discard(key)
+            if key == 'weights':
+                self._values.pop('weights_concentration', None)
+
+
+    def _get_column(self, key:str):
+        """Returns the column of a results key, stacking it on first use.
+        Stacked columns are returned as _StackedColumn objects."""
+        if key not in self._columns:
+            values = [item[key] for item in self.raw_data if key in item]
+            column = _to_column(values)
+            self._columns[key] = _StackedColumn(column) if isinstance(column, np.ndarray) else column
+        return self._columns[key]
+
+
+    def append(self, result:dict):
+        """Appends the result of one task. Materialized columns are
+        updated in place (amortized O(1) per task).
+
+        Parameters
+        ----------
+        result : dict
+            Prediction results of one task (output_details).
+
+        Raises
+        ------
+        TypeError
+            If result is not a dictionary.
+        """        
+        self.extend([result])
+
+
+    def extend(self, results):
+        """Appends the results of several tasks, e.g. one wave of results
+        retrieved with iter_tasks_api. Materialized columns are updated
+        in place (amortized O(1) per task).
+
+        Parameters
+        ----------
+        results : iterable of dict
+            Prediction results of the tasks (output_details).
+
+        Raises
+        ------
+        TypeError
+            If items in results are not dictionaries.
+        """        
+        self._extend(list(results))
+
+
+    def merge(self, other:'PredictionResults'):
+        """Appends the results of another PredictionResults object.
+        Columns stacked in both objects are concatenated directly.
+
+        Parameters
+        ----------
+        other : PredictionResults
+            Results to append, left unchanged.
+
+        Raises
+        ------
+        TypeError
+            If other is not a PredictionResults object.
+        """        
+
+        if not isinstance(other, PredictionResults):
+            raise TypeError("PredictionResults: Can only merge PredictionResults objects")
+
+        blocks = {
+            key: column.array for key, column in other._columns.items()
+            if isinstance(column, _StackedColumn)
+        }
+        self._extend(list(other.raw_data), blocks)
+
+
+    @classmethod
+    def from_iterable(cls, results, batch_size:int=1024):
+        """Builds results from an iterable, e.g. a generator of results
+        fetched in waves, reading batch_size results at a time.
+
+        Parameters
+        ----------
+        results : iterable
+            Results dictionaries, or lists of results dictionaries.
+        batch_size : int, optional
+            Number of results added at a time, by default 1024.
+
+        Returns
+        -------
+        PredictionResults
+            The results.
+
+        Raises
+        ------
+        ValueError
+            If results is empty.
+        """        
+
+        obj = None
+        batch = []
+        for item in results:
+            if isinstance(item, dict):
+                batch.append(item)
+            else:
+                batch.extend(item)
+
+            if len(batch) >= batch_size:
+                if obj is None:
+                    obj = cls(batch)
+                else:
+                    obj.extend(batch)
+                batch = []
+
+        if obj is None:
+            return cls(batch)
+        if batch:
+            obj.extend(batch)
+        return obj
+
+
+    def _extend(self, results:list, blocks:dict=None):
+        """Appends results to raw_data and to the materialized columns.
+        blocks holds already stacked values by key (see merge)."""
+
+        if not all(isinstance(item, dict) for item in results):
+            raise TypeError("PredictionResults: Items in raw_data must be dictionaries")
+
+        self.raw_data.extend(results)
+
+        for key in list(self._columns):
+            column = self._columns[key]
+            values = [item[key] for item in results if key in item]
+            if not values:
+                continue
+
+            if isinstance(column, _StackedColumn):
+                block = blocks.get(key) if blocks else None
+                if block is None or len(block) != len(values):
+                    block = column.stack(values)
+                start = len(column)
+                if block is None or not column.extend(block):
+                    # Values do not fit the column anymore: rebuild it on next access
+                    self.release(key)
+                    continue
+                new_values = _column_values(column.array[start:])
+            else:
+                # List columns are also the attribute values
+                new_values = _unwrap_scalars(values)
+                column.extend(new_values)
+
+            cached = self._values.get(key)
+            if cached is not column and isinstance(cached, list):
+                cached.extend(new_values)
+
+            if key == 'weights' and 'weights_concentration' in self._values:
+                self._values['weights_concentration'].extend(
+                    _weights_concentration(block) if isinstance(column, _StackedColumn)
+                    else [np.std(row) for row in values]
+                )
+
+
+    def column(self, key:str, squeeze:bool=True):
+        """Returns the columnar storage of a results key, e.g. the Q-by-N
+        weights matrix.
+
+        Parameters
+        ----------
+        key : str
+            Results key (output_details attribute).
+        squeeze : bool, optional
+            Drop the singleton axes of the per-task arrays, e.g. (Q, 1, N)
+            weights become (Q, N), by default True.
+
+        Returns
+        -------
+        ndarray or list
+            Stacked per-task values (first axis is the task), or the list
+            of values if they could not be stacked.
+
+        Raises
+        ------
+        KeyError
+            If key is not a results key.
+        """        
+
+        if key not in self._keys:
+            raise KeyError(key)
+
+        column = self._get_column(key)
+        if isinstance(column, _StackedColumn):
+            column = column.array
+        if squeeze and isinstance(column, np.ndarray) and column.ndim > 1:
+            kept_axes = [column.shape[0]] + [size for size in column.shape[1:] if size != 1]
+            column = column.reshape(kept_axes)
+        return column
+
+
+    def _weights_concentration(self):
+        """Standard deviation of the weights of every task, computed in one
+        vectorized call when the weights are stacked."""
+        weights = self._get_column('weights')
+        if isinstance(weights, _StackedColumn):
+            return _weights_concentration(weights.array)
+        return [np.std(row) for row in self.weights]
+
 
     def attributes(self):
         """Display a list of accessible attributes of the class
@@ -69,16 +375,64 @@ class PredictionResults:
             List of accessible attributes of the class.
         """        
         
-        attribute_list = [key for key in self.__dict__.keys() if not key.startswith('__')]
+        attribute_list = ['raw_data'] + self._keys
+        if 'weights' in self._keys:
+            attribute_list.append('weights_concentration')
+        attribute_list += [key for key in self._values if key not in attribute_list]
         return attribute_list
 
 
     def display(self):
         """Display key-value pairs of all accessible attributes of the class.
         """        
-        for attr in dir(self):
-            if not attr.startswith('__') and not callable(getattr(self, attr)):
-                print(f"{attr}: {getattr(self, attr)}")
+        for attr in self.attributes():
+            print(f"{attr}: {getattr(self, attr)}")
+
+
+    def save_columnar(self, filename:str, compression=None, compresslevel:int=None):
+        """Saves the raw results to a binary columnar `.csac` file. Per-task
+        arrays are stacked into typed columns, see pack_records.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file to save the results in.
+        compression : str or dict, optional
+            Codec of every column ('none', 'zlib', 'bz2' or 'lzma') or a
+            dictionary of codecs by key, by default None (uncompressed).
+        compresslevel : int, optional
+            Compression level of the codec, by default None.
+
+        Returns
+        -------
+        str
+            The name of the saved file.
+        """        
+
+        columns, layout = pack_records(self.raw_data)
+        return save_to_columnar(filename, meta={'layout': layout}, compression=compression,
+                                compresslevel=compresslevel, **columns)
+
+
+    @classmethod
+    def load_columnar(cls, file_path:str, mmap:bool=True):
+        """Loads results saved with save_columnar.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the `.csac` file.
+        mmap : bool, optional
+            Memory-map the uncompressed columns, by default True.
+
+        Returns
+        -------
+        PredictionResults
+            Results rebuilt from the file.
+        """        
+
+        data, meta = load_columnar(file_path, mmap=mmap)
+        return cls(unpack_records(data, meta['layout']))
 
 
     def __repr__(self):
@@ -86,4 +440,101 @@ class PredictionResults:
         """
         class_name = self.__class__.__name__
         attributes = "\n".join(f"- {key}" for key in self.raw_data[0].keys())
-        return f"\nResults:\n--------- \n{attributes}\n--------- "
\ No newline at end of file
+        return f"\nResults:\n--------- \n{attributes}\n--------- "
+
+
+def _to_column(values:list):
+    """Stacks a list of per-task values into one ndarray when they are
+    numeric ndarrays of the same shape and dtype. (1, 1) arrays are
+    unwrapped, so the column of scalar results is one-dimensional. Other
+    values are returned as a list, with (1, 1) arrays unwrapped into
+    scalars.
+    """
+
+    if not values or not all(
+        isinstance(value, np.ndarray) and value.dtype.kind in 'biufc'
+        for value in values
+    ):
+        return _unwrap_scalars(values)
+
+    shape, dtype = values[0].shape, values[0].dtype
+    if any(value.shape != shape or value.dtype != dtype for value in values):
+        return _unwrap_scalars(values)
+
+    column = np.stack(values)
+    if shape == (1, 1):
+        column = column.reshape(len(values))
+    return column
+
+
+def _unwrap_scalars(values:list):
+    """Copy of a list of per-task values with (1, 1) arrays unwrapped
+    into scalars."""
+    return [
+        value[0][0] if isinstance(value, np.ndarray) and value.shape == (1, 1) else value
+        for value in values
+    ]
+
+
+def _weights_concentration(weights:np.ndarray):
+    """Standard deviation of every row of a stacked weights column."""
+    return list(np.std(weights.reshape(len(weights), -1), axis=1))
+
+
+def _column_values(column):
+    """Per-task values of a column, as a list. Values of stacked columns
+    are views of the column with the shape of the original values."""
+    if isinstance(column, _StackedColumn):
+        column = column.array
+    return list(column) if isinstance(column, np.ndarray) else column
+
+
+class _StackedColumn:
+    """Growable stacked column: an ndarray buffer with spare capacity
+    along the first (task) axis, doubled when full, so that appending
+    tasks is amortized O(1).
+    """
+
+    __slots__ = ('buffer', 'size')
+
+    def __init__(self, array:np.ndarray):
+        self.buffer = array
+        self.size = len(array)
+
+
+    def __len__(self):
+        return self.size
+
+
+    @property
+    def array(self):
+        """The stacked values (view of the filled part of the buffer)."""
+        return self.buffer[:self.size]
+
+
+    def stack(self, values:list):
+        """Stacks values with the layout of the column, None if they are
+        not numeric arrays of the shape of the column values."""
+        block = _to_column(values)
+        if not isinstance(block, np.ndarray) or block.shape[1:] != self.buffer.shape[1:]:
+            return None
+        return block
+
+
+    def extend(self, block:np.ndarray):
+        """Appends stacked values. Returns False (and leaves the column
+        unchanged) if they do not have the shape and dtype of the column."""
+
+        if block.shape[1:] != self.buffer.shape[1:] or block.dtype != self.buffer.dtype:
+            return False
+
+        required = self.size + len(block)
+        if required > len(self.buffer):
+            capacity = max(required, 2 * len(self.buffer))
+            buffer = np.empty((capacity,) + self.buffer.shape[1:], dtype=self.buffer.dtype)
+            buffer[:self.size] = self.array
+            self.buffer = buffer
+
+        self.buffer[self.size:required] = block
+        self.size = required
+        return True
@@ -1,3 +1,5 @@
+# Third-party library imports
+import numpy as np # For numerical computations and array operations
 
 
 # Helper function to flatten nested lists
@@ -36,3 +38,19 @@ def flatten_nested_list(nested_list):
     
     # Return the element as is if not nested
     return nested_list  
+
+
+class ArrayReference:
+    """Base class of lazy, picklable references to an ndarray held
+    elsewhere (e.g. a cache or shared memory), such as CovInvReference.
+    Serializers (Float32Encoder, convert_ndarray_to_list) resolve them
+    into their array, and np.asarray(reference) returns the array.
+    """
+
+    def resolve(self):
+        """Returns the referenced array."""
+        raise NotImplementedError
+
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.resolve(), dtype=dtype)
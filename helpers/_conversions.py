@@ -3,48 +3,277 @@ import numpy as np
 from datetime import datetime
 from typing import Any, Dict, List, Union
 
+from csa_common_lib.helpers._arrays import ArrayReference
+
 # Conditionally import pandas if not in a Lambda environment
 if os.getenv('LAMBDA_ENV') is None:
     import pandas as pd
 
 
-def convert_to_float32(obj):
+def transform_tree(obj, rules, in_place: bool = False):
     """
-    Recursively converts all numerical values in a dictionary or list to 
-    float32. If `obj` is neither a dictionary nor a list, it directly attempts 
-    to convert `obj` to float32.
+    Transforms a nested structure of dictionaries, lists and tuples in a
+    single pass, applying a composed set of leaf rules.
+
+    A rule is a `(types, func)` pair. Every node (containers included) is
+    passed through the rules in order: each rule whose types match the
+    current value replaces it with `func(value)`, unless `func` returns
+    `NotImplemented`. A node transformed by any rule is not traversed further,
+    other dictionaries, lists and tuples are traversed. For example,
+    `[FLOAT_TO_FLOAT32, NDARRAY_TO_LIST]` converts arrays to float32, then to
+    lists.
+
+    The traversal is iterative (no recursion limit on deep structures), and
+    objects referenced several times are transformed once and shared in the
+    result.
 
     Parameters
     ----------
-    obj : dict, list, or any
-        The dictionary, list, or numerical value to convert.
+    obj : dict, list, tuple, or any
+        The structure to transform.
+    rules : list of tuple
+        `(types, func)` leaf rules, e.g. NDARRAY_TO_LIST, SERIES_TO_LIST,
+        DATETIME_TO_STRING, FLOAT_TO_FLOAT32.
+    in_place : bool, optional
+        If True, dictionaries and lists are updated in place instead of
+        being copied. Default is False.
 
     Returns
     -------
-    obj : dict, list, or any
+    obj : dict, list, tuple, or any
+        The transformed structure.
+
+    Raises
+    ------
+    ValueError
+        If the structure contains a circular reference.
+    """
+
+    memo = {}  # result by id of the transformed node
+
+    def _visit(node):
+        """Applies the rules to a node. Returns (value, traverse)."""
+        node_id = id(node)
+        if node_id in memo:
+            return memo[node_id], False
+
+        value = node
+        transformed = False
+        for types, func in rules:
+            if isinstance(value, types):
+                result = func(value)
+                if result is not NotImplemented:
+                    value = result
+                    transformed = True
+
+        if not transformed and isinstance(value, (dict, list, tuple)):
+            return value, True
+
+        memo[node_id] = value
+        return value, False
+
+    def _items(node):
+        return iter(node.items()) if isinstance(node, dict) else enumerate(node)
+
+    value, traverse = _visit(obj)
+    if not traverse:
+        return value
+
+    # Depth-first traversal: each frame holds a container, an iterator over
+    # its items and the transformed values collected so far.
+    in_progress = {id(obj)}
+    stack = [(obj, _items(obj), [])]
+    while True:
+        node, items, values = stack[-1]
+
+        for key, child in items:
+            child_value, traverse = _visit(child)
+            if traverse:
+                if id(child) in in_progress:
+                    raise ValueError("transform_tree:Circular reference detected.")
+                in_progress.add(id(child))
+                values.append((key, None))
+                stack.append((child, _items(child), []))
+                break
+            values.append((key, child_value))
+        else:
+            # All items are done: build the container.
+            stack.pop()
+            in_progress.discard(id(node))
+            result = _build_container(node, values, in_place)
+            memo[id(node)] = result
+
+            if not stack:
+                return result
+
+            # Hand the result to the parent frame.
+            parent_values = stack[-1][2]
+            parent_values[-1] = (parent_values[-1][0], result)
+
+
+def _build_container(node, values: list, in_place: bool):
+    """Builds a transformed dictionary, list or tuple from its (key, value) pairs."""
+    if isinstance(node, dict):
+        result = node if in_place else {}
+        for key, value in values:
+            result[key] = value
+        return result
+    elif isinstance(node, list):
+        if in_place:
+            for index, value in values:
+                node[index] = value
+            return node
+        return [value for _, value in values]
+    elif hasattr(node, '_fields'):
+        # Named tuple
+        return type(node)(*(value for _, value in values))
+    else:
+        return tuple(value for _, value in values)
+
+
+def _ndarray_to_list(obj):
+    return obj.tolist()
+
+
+def _array_reference_to_list(obj):
+    return obj.resolve().tolist()
+
+
+def _datetime_to_string(obj):
+    return obj.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _to_float32(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.astype(np.float32, copy=False) if obj.dtype.kind in 'iuf' else NotImplemented
+    if isinstance(obj, (list, tuple)):
+        array = _numeric_sequence_to_float32(obj)
+        return NotImplemented if array is None else array
+    return np.float32(obj) if _is_numeric_scalar(obj) else NotImplemented
+
+
+# Leaf rules of transform_tree
+NDARRAY_TO_LIST = (np.ndarray, _ndarray_to_list)
+ARRAY_REFERENCE_TO_LIST = (ArrayReference, _array_reference_to_list)
+DATETIME_TO_STRING = (datetime, _datetime_to_string)
+FLOAT_TO_FLOAT32 = ((np.ndarray, list, tuple, int, float, np.number), _to_float32)
+if 'pd' in globals():
+    SERIES_TO_LIST = (pd.Series, _ndarray_to_list)
+else:
+    # pandas is not available (e.g. in Lambda): the rule never matches
+    SERIES_TO_LIST = ((), _ndarray_to_list)
+
+
+def convert_to_float32(obj, lists_as_arrays: bool = False, in_place: bool = False):
+    """
+    Recursively converts all numerical values in a dictionary, list or tuple
+    to float32.
+
+    Numeric ndarrays are converted with a single `astype` call (without a
+    copy if they already are float32), and homogeneous numeric lists are
+    converted as a whole rather than element by element. Non-numeric leaves
+    (strings, booleans, None, object arrays, ...) are returned unchanged.
+
+    Parameters
+    ----------
+    obj : dict, list, tuple, np.ndarray, or any
+        The dictionary, list, array or numerical value to convert.
+    lists_as_arrays : bool, optional
+        If True, homogeneous numeric lists and tuples are returned as float32
+        ndarrays. If False, the structure is preserved: they are returned as
+        (nested) lists and tuples of float32 values. Default is False.
+    in_place : bool, optional
+        If True, dictionaries and lists are updated in place instead of
+        being copied. Default is False.
+
+    Returns
+    -------
+    obj : dict, list, np.ndarray, or any
         The converted object with all numerical values as float32, or the 
         original object if conversion is not applicable.
     """
     
-    if isinstance(obj, dict):
+    if isinstance(obj, np.ndarray):
+        # Convert numeric arrays in one pass, leave other arrays as-is.
+        if obj.dtype.kind in 'iuf':
+            return obj.astype(np.float32, copy=False)
+        return obj
+    elif isinstance(obj, dict):
         # Recursively convert all values in the dictionary to float32.
-        return {k: convert_to_float32(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        # Recursively convert all elements in the list to float32.
-        return [convert_to_float32(elem) for elem in obj]
-    else:
-        # Attempt to convert the object to float32 if it is a numerical value.
-        try:
-            return np.float32(obj)
-        except (ValueError, TypeError):
-            # Return the object as-is if it cannot be converted.
+        if in_place:
+            for k, v in obj.items():
+                obj[k] = convert_to_float32(v, lists_as_arrays, in_place)
             return obj
+        return {k: convert_to_float32(v, lists_as_arrays, in_place) for k, v in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        # Convert homogeneous numeric sequences as a whole.
+        array = _numeric_sequence_to_float32(obj)
+        if array is not None:
+            if lists_as_arrays:
+                return array
+            if array.ndim == 1:
+                values = list(array)
+            else:
+                values = [convert_to_float32(elem, lists_as_arrays) for elem in obj]
+            if in_place and isinstance(obj, list):
+                obj[:] = values
+                return obj
+            return tuple(values) if isinstance(obj, tuple) else values
+
+        # Otherwise, recursively convert all elements.
+        if in_place and isinstance(obj, list):
+            for i, elem in enumerate(obj):
+                obj[i] = convert_to_float32(elem, lists_as_arrays, in_place)
+            return obj
+        converted = [convert_to_float32(elem, lists_as_arrays, in_place) for elem in obj]
+        return tuple(converted) if isinstance(obj, tuple) else converted
+    elif _is_numeric_scalar(obj):
+        return np.float32(obj)
+    else:
+        # Return the object as-is if it is not numerical.
+        return obj
+
+
+def _is_numeric_scalar(obj) -> bool:
+    """Checks whether an object is a real, non-boolean number."""
+    return (isinstance(obj, (int, float, np.integer, np.floating))
+            and not isinstance(obj, (bool, np.bool_)))
+
+
+def _numeric_sequence_to_float32(obj):
+    """
+    Converts a homogeneous (possibly nested) numeric list or tuple to a
+    float32 array. Returns None if the sequence is empty, holds arrays, or
+    holds any non-numeric or boolean value.
+    """
+
+    if not obj:
+        return None
+
+    first = obj[0]
+    while isinstance(first, (list, tuple)) and first:
+        first = first[0]
+    if not _is_numeric_scalar(first):
+        return None
+
+    try:
+        array = np.asarray(obj)
+    except ValueError:
+        # Ragged sequence
+        return None
+
+    # Mixed sequences end up as strings, objects, booleans or complex values
+    if array.dtype.kind not in 'iuf':
+        return None
+
+    return array.astype(np.float32, copy=False)
 
 
 def convert_dict_to_list(obj):
     """
     Recursively converts numpy arrays and pandas Series in the dictionary 
-    to lists. It handles nested dictionaries and lists as well.
+    to lists. It handles nested dictionaries and lists as well. Array
+    references (e.g. a lazy cov_inv) are resolved and converted too.
 
     Parameters
     ----------
@@ -58,26 +287,13 @@ def convert_dict_to_list(obj):
         The converted object with all numpy arrays and pandas Series 
         converted to lists, or the original object if conversion is not applicable.
     """
-    if isinstance(obj, dict):
-        # Recursively convert all values in the dictionary.
-        return {k: convert_dict_to_list(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        # Recursively convert all elements in the list.
-        return [convert_dict_to_list(item) for item in obj]
-    elif isinstance(obj, np.ndarray):
-        # Convert numpy array to a list.
-        return obj.tolist()
-    elif 'pd' in globals() and isinstance(obj, pd.Series):
-        # Convert pandas Series to a list if pandas is available.
-        return obj.tolist()
-    else:
-        # Return the object as-is if no conversion is applicable.
-        return obj
+    return transform_tree(obj, [NDARRAY_TO_LIST, ARRAY_REFERENCE_TO_LIST, SERIES_TO_LIST])
     
     
 def convert_ndarray_to_list(obj):
     """
     Recursively converts numpy ndarrays within an object to lists.
+    Array references (e.g. a lazy cov_inv) are resolved and converted too.
     
     Parameters:
     obj (any): The input object which may contain numpy ndarrays.
@@ -86,16 +302,7 @@ def convert_ndarray_to_list(obj):
     any: The converted object with all numpy ndarrays turned into lists.
     """
 
-    if isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {k: convert_ndarray_to_list(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_ndarray_to_list(item) for item in obj]
-    elif isinstance(obj, tuple):
-        return tuple(convert_ndarray_to_list(item) for item in obj)
-    else:
-        return obj
+    return transform_tree(obj, [NDARRAY_TO_LIST, ARRAY_REFERENCE_TO_LIST])
     
 
 def convert_datetime_to_string(data: Union[Dict[str, Any], List[Any]]) -> Union[Dict[str, Any], List[Any]]:
@@ -112,17 +319,75 @@ def convert_datetime_to_string(data: Union[Dict[str, Any], List[Any]]) -> Union[
     Union[Dict[str, Any], List[Any]]
         The input data with datetime objects converted to strings.
     """
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.strftime('%Y-%m-%d %H:%M:%S')  # Convert datetime to string
-            elif isinstance(value, (dict, list)):
-                data[key] = convert_datetime_to_string(value)  # Recursive call for nested structures
-    elif isinstance(data, list):
-        for index in range(len(data)):
-            if isinstance(data[index], datetime):
-                data[index] = data[index].strftime('%Y-%m-%d %H:%M:%S')  # Convert datetime to string
-            elif isinstance(data[index], (dict, list)):
-                data[index] = convert_datetime_to_string(data[index])  # Recursive call for nested structures
-
-    return data
\ No newline at end of file
+    return transform_tree(data, [DATETIME_TO_STRING], in_place=True)
+
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark: yhat_details payloads as returned by the API (lists) and
+    # as computed locally (ndarrays), Q tasks with N observations
+    Q, N = 200, 2_000
+    rng = np.random.default_rng(0)
+
+    def _legacy_convert_to_float32(obj):
+        if isinstance(obj, dict):
+            return {k: _legacy_convert_to_float32(v) for k, v in obj.items()}
+        elif isinstance(obj, list):
+            return [_legacy_convert_to_float32(elem) for elem in obj]
+        try:
+            return np.float32(obj)
+        except (ValueError, TypeError):
+            return obj
+
+    def _yhat_details(as_lists):
+        details = []
+        for _ in range(Q):
+            detail = {
+                'weights': rng.standard_normal((1, N)),
+                'relevance': rng.standard_normal((N, 1)),
+                'similarity': rng.standard_normal((N, 1)),
+                'info': rng.standard_normal((N, 1)),
+                'fit': float(rng.standard_normal()),
+                'adjusted_fit': float(rng.standard_normal()),
+                'K': 10,
+                'is_threshold': True,
+                'label': 'grid',
+            }
+            if as_lists:
+                detail = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in detail.items()}
+            details.append(detail)
+        return details
+
+    for as_lists in (True, False):
+        payload = _yhat_details(as_lists)
+        label = 'lists' if as_lists else 'ndarrays'
+
+        start_time = time.perf_counter()
+        _legacy_convert_to_float32(payload)
+        legacy_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        convert_to_float32(payload)
+        vectorized_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        convert_to_float32(payload, in_place=True)
+        in_place_time = time.perf_counter() - start_time
+
+        print(f"{label}: legacy {legacy_time:.3f}s, vectorized {vectorized_time:.3f}s, "
+              f"in place {in_place_time:.3f}s")
+
+    # Benchmark: chained conversions versus one transform_tree pass over a
+    # receipt-like payload
+    payload = {'yhat_details': _yhat_details(False), 'timestamp': datetime.now()}
+
+    start_time = time.perf_counter()
+    convert_datetime_to_string(convert_dict_to_list(convert_ndarray_to_list(payload)))
+    chained_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    transform_tree(payload, [NDARRAY_TO_LIST, SERIES_TO_LIST, DATETIME_TO_STRING])
+    single_pass_time = time.perf_counter() - start_time
+
+    print(f"receipt payload: chained {chained_time:.3f}s, single pass {single_pass_time:.3f}s")
@@ -1,9 +1,31 @@
 import os
 import crcmod
 import io
+import mmap
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 
+import numpy as np
 from tempfile import _TemporaryFileWrapper, SpooledTemporaryFile
 
+# Conditionally import xxhash, an optional faster non-cryptographic hash
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+# Size of the chunks read when hashing files and large arrays
+CHECKSUM_CHUNK_SIZE = 1 << 20
+
+# Supported checksum algorithms
+CHECKSUM_ALGORITHMS = ('crc64', 'crc32', 'xxh64')
+
+# Algorithms that hold the GIL while hashing (crcmod's C extension), hashed
+# in worker processes rather than threads by build_checksum_manifest
+GIL_BOUND_ALGORITHMS = ('crc64',)
+
 def is_valid_path(path:str):
     """Checks if the specified path's directoryexists and is writable.
 
@@ -94,6 +116,8 @@ def calc_crc64(input_data):
     because it is faster to compute than MD5 or SHA-1/256. Given tradeoffs
     between speed and risk of collisions, this is a good balance.
 
+    Files are read in chunks, so they are never loaded into memory whole.
+
     Parameters
     ----------
     input_data : str or byte
@@ -108,34 +132,306 @@ def calc_crc64(input_data):
         Hex string of the CRC 64 checksum.
     """    
     
-    # Define CRC64 parameters and get the function object from 
-    # the library's factory function. These parameters will also
-    # match 7-zip's CRC utility for testing.
-    crc64 = crcmod.mkCrcFun(poly=0x142F0E1EBA9EA3693, initCrc=0, xorOut=0xFFFFFFFFFFFFFFFF)
-
     # open the file, read the data, and return the HEX CRC64 checksum
-    data = None
+    checksum = None
     if input_data is not None:
         if is_file_obj(input_data):
-            data = input_data.read() # read the file object buffer
+            checksum = _hash_chunks(_iter_file_chunks(input_data)) # read the file object buffer
             input_data.seek(0) # reset the file buffer pointer
             
         elif is_file_path(input_data):
             try:
                 with open(input_data, 'rb') as f:
-                    data = f.read()
+                    checksum = _hash_chunks(_iter_file_chunks(f))
             except IOError:
                 # If not a file or some issue reading path
-                data = None
+                checksum = None
                 
         elif is_byte_data(input_data):
-            data = input_data # assume byte data
+            checksum = _hash_chunks([input_data]) # assume byte data
         
-    # calculate checksum    
-    if data is None:
+    # return checksum value (hex)
+    if checksum is None:
         checksum = hex(0)
+    return checksum
+
+
+def calc_array_checksum(array, algorithm:str='crc64'):
+    """Calculates the checksum of an ndarray directly from its memory
+    buffer, without serializing it. The shape and dtype (including byte
+    order) are hashed along with the data, so arrays with the same bytes
+    but a different layout have different checksums. The checksum is
+    stable across runs and processes.
+
+    Parameters
+    ----------
+    array : ndarray or array_like
+        Array to hash.
+    algorithm : str, optional
+        'crc64' (default), 'crc32', or 'xxh64' (XXH64 as computed by
+        xxh64sum, faster, requires the xxhash package).
+
+    Returns
+    -------
+    str
+        Hex string of the checksum.
+
+    Raises
+    ------
+    ValueError
+        If the algorithm is not supported or not available.
+    """    
+
+    array = np.asarray(array)
+    header = f"{array.dtype.str}{array.shape}".encode('utf-8')
+
+    if array.dtype.hasobject:
+        raise ValueError("calc_array_checksum:Object arrays have no stable memory buffer to hash.")
+
+    return _hash_chunks(_iter_array_chunks(array, header), algorithm)
+
+
+def calc_file_checksum(file_path:str, algorithm:str='crc64', chunk_size:int=CHECKSUM_CHUNK_SIZE,
+                       use_mmap:bool=False):
+    """Calculates the checksum of a file, reading it in fixed-size chunks
+    (or memory-mapping it), so memory use does not grow with the file size.
+    For 'crc64', the checksum matches calc_crc64(file_path).
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the file.
+    algorithm : str, optional
+        'crc64' (default), 'crc32', or 'xxh64' (XXH64 as computed by
+        xxh64sum, requires the xxhash package).
+    chunk_size : int, optional
+        Number of bytes hashed at a time, by default CHECKSUM_CHUNK_SIZE (1 MiB).
+    use_mmap : bool, optional
+        Memory-map the file instead of reading it, which avoids copying the
+        data into Python bytes objects, by default False.
+
+    Returns
+    -------
+    str
+        Hex string of the checksum.
+
+    Raises
+    ------
+    OSError
+        If the file cannot be read.
+    ValueError
+        If the algorithm is not supported or not available.
+    """    
+
+    with open(file_path, 'rb') as f:
+        if not use_mmap or os.fstat(f.fileno()).st_size == 0:
+            return _hash_chunks(_iter_file_chunks(f, chunk_size), algorithm)
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            buffer = memoryview(mapped)
+            try:
+                return _hash_chunks(
+                    (buffer[start:start + chunk_size] for start in range(0, len(buffer), chunk_size)),
+                    algorithm
+                )
+            finally:
+                buffer.release()
+
+
+def build_checksum_manifest(paths, algorithm:str='crc32', max_workers:int=None,
+                            extension:str=None, use_mmap:bool=False):
+    """Calculates the checksums of many files at once, e.g. for integrity
+    sweeps over a vault of .npz files. crc32 and xxh64 are hashed by a
+    thread pool (file reads and zlib/xxhash release the GIL), crc64 by a
+    process pool, as crcmod holds the GIL.
+
+    Parameters
+    ----------
+    paths : str or iterable of str
+        File paths, or a directory that is searched recursively.
+    algorithm : str, optional
+        'crc32' (default), 'crc64', or 'xxh64' (XXH64 as computed by
+        xxh64sum, requires the xxhash package).
+    max_workers : int, optional
+        Number of threads (or processes for crc64), by default None (the
+        executor default).
+    extension : str, optional
+        Only hash files with this extension (e.g. '.npz'), by default None.
+    use_mmap : bool, optional
+        Memory-map the files instead of reading them, by default False.
+
+    Returns
+    -------
+    dict
+        Checksum (hex string) by file path, in the order of paths. Files
+        that cannot be read map to None.
+
+    Raises
+    ------
+    ValueError
+        If the algorithm is not supported or not available.
+    """    
+
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise ValueError(f"build_checksum_manifest:Unsupported checksum algorithm '{algorithm}'. "
+                         f"Choose from {CHECKSUM_ALGORITHMS}.")
+
+    if isinstance(paths, str):
+        paths = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(paths) for name in names
+        )
+    paths = [path for path in paths if extension is None or path.endswith(extension)]
+
+    checksum = partial(_manifest_checksum, algorithm=algorithm, use_mmap=use_mmap)
+    if algorithm in GIL_BOUND_ALGORITHMS and len(paths) > 1:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
     else:
-        checksum = hex(crc64(data))[2:] # remove '0x' prefix
-       
-    # return checksum value (hex)
-    return checksum
\ No newline at end of file
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    with executor:
+        return dict(zip(paths, executor.map(checksum, paths)))
+
+
+def _manifest_checksum(path:str, algorithm:str, use_mmap:bool):
+    """Checksum of a manifest file, None if it cannot be read."""
+    try:
+        return calc_file_checksum(path, algorithm, use_mmap=use_mmap)
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _get_crc64_fun():
+    """Returns the CRC64 function, built once per process."""
+
+    # Define CRC64 parameters and get the function object from 
+    # the library's factory function. These parameters will also
+    # match 7-zip's CRC utility for testing.
+    return crcmod.mkCrcFun(poly=0x142F0E1EBA9EA3693, initCrc=0, xorOut=0xFFFFFFFFFFFFFFFF)
+
+
+def _hash_chunks(chunks, algorithm:str='crc64'):
+    """Hashes an iterable of bytes-like chunks and returns the hex digest."""
+
+    if algorithm == 'crc64':
+        crc64 = _get_crc64_fun()
+        crc = 0
+        for chunk in chunks:
+            crc = crc64(chunk, crc)
+        return hex(crc)[2:] # remove '0x' prefix
+
+    elif algorithm == 'crc32':
+        crc = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+        return hex(crc)[2:]
+
+    elif algorithm == 'xxh64':
+        if xxhash is None:
+            raise ValueError("_hash_chunks:The 'xxh64' checksum requires the xxhash package.")
+        hasher = xxhash.xxh64()
+        for chunk in chunks:
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
+    raise ValueError(f"_hash_chunks:Unsupported checksum algorithm '{algorithm}'. "
+                     f"Choose from {CHECKSUM_ALGORITHMS}.")
+
+
+def _iter_file_chunks(f, chunk_size:int=CHECKSUM_CHUNK_SIZE):
+    """Yields the content of an open binary file in chunks."""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _iter_array_chunks(array:np.ndarray, header:bytes, chunk_size:int=CHECKSUM_CHUNK_SIZE):
+    """Yields a header then the C-ordered bytes of an array, as memoryview
+    slices of its buffer. Non-contiguous arrays are copied block by block
+    rather than as a whole."""
+
+    yield header
+
+    if array.size == 0:
+        return
+
+    if array.flags.c_contiguous:
+        buffer = memoryview(array).cast('B')
+        for start in range(0, len(buffer), chunk_size):
+            yield buffer[start:start + chunk_size]
+        return
+
+    # Copy blocks of rows (along the first axis) in C order
+    rows_per_chunk = max(1, chunk_size // max(1, array[0].nbytes))
+    for start in range(0, len(array), rows_per_chunk):
+        block = np.ascontiguousarray(array[start:start + rows_per_chunk])
+        yield memoryview(block).cast('B')
+
+
+if __name__ == "__main__":
+    import pickle
+    import subprocess
+    import sys
+    import time
+
+    # Stability check: array checksums must not depend on the run, the
+    # process (hash seed) or the memory layout, and must match these
+    # reference values
+    reference = np.arange(12, dtype='<f8').reshape(3, 4)
+    expected = {'crc64': 'e9ae36242e473d79', 'crc32': '89b2ddda'}
+    assert calc_array_checksum(reference, 'crc64') == expected['crc64']
+    assert calc_array_checksum(reference, 'crc32') == expected['crc32']
+
+    script = (
+        "import numpy as np;"
+        "from csa_common_lib.helpers._os import calc_array_checksum;"
+        "a = np.asfortranarray(np.arange(12, dtype='<f8').reshape(3, 4));"
+        "print(calc_array_checksum(a, 'crc64'), calc_array_checksum(a, 'crc32'))"
+    )
+    for seed in ('0', '1'):
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                env={**os.environ, 'PYTHONHASHSEED': seed}, check=True)
+        assert output.stdout.split() == [expected['crc64'], expected['crc32']], output.stdout
+    assert calc_array_checksum(reference.reshape(4, 3)) != expected['crc64']
+    assert calc_array_checksum(reference.astype('<f4')) != expected['crc64']
+    print(f"Stable checksums: {expected}")
+
+    # Benchmark: pickled versus buffer checksums of a large X matrix
+    X = np.random.default_rng(0).standard_normal((20_000, 500))
+
+    start_time = time.perf_counter()
+    calc_crc64(pickle.dumps(X))
+    print(f"pickle + crc64: {time.perf_counter() - start_time:.3f}s")
+
+    for algorithm in CHECKSUM_ALGORITHMS:
+        if algorithm == 'xxh64' and xxhash is None:
+            continue
+        start_time = time.perf_counter()
+        calc_array_checksum(X, algorithm)
+        print(f"calc_array_checksum ({algorithm}): {time.perf_counter() - start_time:.3f}s")
+
+    # Benchmark: serial versus threaded checksums of a directory of files
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        rng = np.random.default_rng(0)
+        for i in range(64):
+            with open(os.path.join(directory, f'file_{i}.npz'), 'wb') as f:
+                f.write(rng.bytes(4 << 20))
+
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory))
+        for algorithm in ('crc64', 'crc32'):
+            start_time = time.perf_counter()
+            serial = {path: calc_file_checksum(path, algorithm) for path in paths}
+            serial_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            manifest = build_checksum_manifest(directory, algorithm, extension='.npz')
+            parallel_time = time.perf_counter() - start_time
+
+            assert manifest == serial
+            pool = 'processes' if algorithm in GIL_BOUND_ALGORITHMS else 'threads'
+            print(f"manifest ({algorithm}, {len(manifest)} files): serial {serial_time:.3f}s, "
+                  f"{pool} {parallel_time:.3f}s")
@@ -7,6 +7,51 @@ import warnings
 import numpy as np
 
 from csa_common_lib.enum_types.functions import PSRFunction
+from csa_common_lib.helpers._arrays import ArrayReference
+from csa_common_lib.toolbox.stats.conditioning import DEFAULT_COLLINEARITY_TOL, check_conditioning
+from csa_common_lib.toolbox.stats.missing_data import has_missing, impute_column_means
+
+
+# Validators of the inputs by key: (validator(obj, K) -> bool, expectation).
+# Built once, rather than on every validation. Options also arrive as
+# lists (PredictionOptions defaults, JSON payloads and receipts), and
+# cov_inv as a lazy CovInvReference, so those are accepted too.
+_INPUT_VALIDATORS = {
+    'y': (lambda obj, K: _validate_ndarray(obj, allow_none=False), 'expecting numpy.ndarray.'),
+    'X': (lambda obj, K: isinstance(obj, str) or _validate_ndarray(obj, allow_none=False), 'expecting numpy.ndarray.'),
+    'theta': (lambda obj, K: _validate_ndarray(obj, 1, K, allow_none=False), 'expecting (1,{K}) numpy.ndarray.'),
+    'cov_inv': (lambda obj, K: isinstance(obj, ArrayReference) or _validate_matrix(obj, K, K),
+                'expecting ({K},{K}) numpy.ndarray, nested list or CovInvReference.'),
+    'threshold': (lambda obj, K: _validate_numeric_or_ndarray(obj) or _validate_numeric_sequence(obj),
+                  'expecting int/float, list of int/float or numpy.ndarray.'),
+    'is_threshold_percent': (lambda obj, K: _validate_bool(obj), 'expecting bool.'),
+    'most_eval': (lambda obj, K: _validate_bool(obj), 'expecting bool.'),
+    'eval_type': (lambda obj, K: _validate_str(obj), 'expecting str.'),
+    'attribute_combi': (lambda obj, K: _validate_matrix(obj, cols=K), 'expecting (:,{K}) numpy.ndarray or nested list.'),
+    'k': (lambda obj, K: _validate_numeric(obj, min_value=1, max_value=K), 'expecting int/float in [1,{K}].'),
+    'max_iter': (lambda obj, K: _validate_numeric_or_ndarray(obj) or _validate_numeric_sequence(obj),
+                 'expecting int/float, list of int/float or numpy.ndarray.'),
+    'adjusted_fit_multiplier': (lambda obj, K: _validate_str(obj), 'expecting str.'),
+    'adj_fit_multiplier': (lambda obj, K: _validate_str(obj), 'expecting str.'),
+    'objective': (lambda obj, K: _validate_str(obj), 'expecting str.'),
+}
+
+# Inputs required by every function type
+_REQUIRED_INPUTS = ('y', 'X', 'theta')
+
+# Optional inputs also required by strict validation, by function type
+_STRICT_INPUTS = {
+    PSRFunction.PSR: ('cov_inv', 'threshold', 'most_eval', 'eval_type', 'is_threshold_percent'),
+    PSRFunction.MAXFIT: ('cov_inv', 'stepsize', 'most_eval', 'eval_type'),
+    PSRFunction.GRID: ('cov_inv', 'stepsize', 'most_eval', 'eval_type', 'attribute_combi', 'k'),
+    PSRFunction.GRID_SINGULARITY: ('cov_inv', 'stepsize', 'most_eval', 'eval_type', 'attribute_combi', 'k'),
+}
+
+# Expectations of the per-task inputs checked by shape and dtype
+_TASK_EXPECTATIONS = {
+    'y': 'expecting ({N},1) numeric numpy.ndarray.',
+    'theta': 'expecting (1,{K}) numeric numpy.ndarray.',
+}
 
 
 def validate_inputs(is_strict:bool, function_type:PSRFunction, **varargin):
@@ -31,58 +76,16 @@ def validate_inputs(is_strict:bool, function_type:PSRFunction, **varargin):
         If invalid input (when !is_strict)
     """    
     # region Input(s) Exist: Do the required input(s) exist
-    # mandatory requirements for both client and serverside
-    _check_key(varargin, 'y', is_strict)
-    _check_key(varargin, 'X', is_strict)
-    _check_key(varargin, 'theta', is_strict)
-    
-    if is_strict:
-        # if strict (exhaustive) requirements are enforced (example API serverside)
-        # then we want to validate optional arguments as well.
-        _check_key(varargin, 'cov_inv', is_strict)
-        
-        if function_type == PSRFunction.PSR:
-            _check_key(varargin, 'threshold', is_strict)
-            _check_key(varargin, 'most_eval', is_strict)
-            _check_key(varargin, 'eval_type', is_strict)
-            _check_key(varargin, 'is_threshold_percent', is_strict)
-            
-        elif function_type == PSRFunction.MAXFIT:
-            _check_key(varargin, 'stepsize', is_strict)
-            _check_key(varargin, 'most_eval', is_strict)
-            _check_key(varargin, 'eval_type', is_strict)
-            
-        elif function_type == PSRFunction.GRID_SINGULARITY or function_type == PSRFunction.GRID:
-            _check_key(varargin, 'stepsize', is_strict)
-            _check_key(varargin, 'most_eval', is_strict)
-            _check_key(varargin, 'eval_type', is_strict)
-            
-            _check_key(varargin, 'attribute_combi', is_strict)
-            _check_key(varargin, 'k', is_strict)
-        else:
-            response_str = f'Invalid function type {function_type}'
-            if is_strict:
-                raise ValueError(response_str)
-            else:
-                warnings.warn(response_str, Warning)
+    # mandatory requirements for both client and serverside and, if strict
+    # (exhaustive) requirements are enforced (example API serverside), the
+    # optional arguments of the function type as well.
+    if is_strict and function_type not in _STRICT_INPUTS:
+        raise ValueError(f'Invalid function type {function_type}')
+
+    for key in _required_inputs(is_strict, function_type):
+        _check_key(varargin, key, is_strict)
     # endregion
     
-    validate_args = {
-        'y': lambda key, obj, K: _validate_ndarray(obj, obj_name=key, allow_none=False),
-        'X': lambda key, obj, K: _validate_ndarray(obj, obj_name=key, allow_none=False),
-        'theta': lambda key, obj, K: _validate_ndarray(obj, 1, K, obj_name=key, allow_none=False),
-        'cov_inv': lambda key, obj, K: _validate_ndarray(obj, K, K, obj_name=key),
-        'threshold': lambda key, obj, K: _validate_numeric_or_ndarray(obj, obj_name=key),
-        'is_threshold_percent': lambda key, obj, K: _validate_bool(obj, obj_name=key), 
-        'most_eval': lambda key, obj, K: _validate_bool(obj, obj_name=key),
-        'eval_type': lambda key, obj, K: _validate_str(obj, obj_name=key),
-        'attribute_combi': lambda key, obj, K: _validate_ndarray(obj, cols=K, obj_name=key),
-        'k': lambda key, obj, K: _validate_numeric(obj, obj_name=key),
-        'max_iter': lambda key, obj, K: _validate_numeric_or_ndarray(obj, obj_name=key),
-        'adjusted_fit_multiplier': lambda key, obj, K: _validate_str(obj, obj_name=key),
-        'objective': lambda key, obj, K: _validate_str(obj, obj_name=key),
-    }
-    
     # initialize
     y_N = None # number of observations (rows) of dependent variable
     N = None # number of observations (rows)
@@ -90,49 +93,190 @@ def validate_inputs(is_strict:bool, function_type:PSRFunction, **varargin):
     
     
     # region Input Type and Dimensions    
-    for key, value in varargin.items():
+    y = varargin.get('y')
+    if y is not None:
+        _validate_ndarray(y, np.ndarray)
+        y_N = y.size
         
-        # DEBUG: Uncomment to view validation
-        # print(f'Validating {key}: {value}')
-        
-        # y is a column vector
-        if key == 'y':
-            _validate_ndarray(value, np.ndarray)
-            y_N = value.size
-        
-        # X is a [N-by-K] matrix
+    # X is a [N-by-K] matrix
+    X = varargin.get('X')
+    if X is not None and not isinstance(X, str):
+        # if X is a reference file, skip validation. (X validation was already done upstream in this case)
+        _validate_ndarray(X, np.ndarray)
+        (N, K) = X.shape
+
+        if N <= K:                
+            raise ValueError("X: The number of observations (rows) must be greater than the number of variables (columns)")
+
+        if y_N != N:
+            raise ValueError("Inputs X and Y must have the same number of observations (rows)")
+
+    # validate the rest of the arguments, reporting every failure at once
+    failures = [
+        f'Invalid {key}, {_INPUT_VALIDATORS[key][1]}'.format(K=_dim(K))
+        for key, value in varargin.items()
+        if key in _INPUT_VALIDATORS and not _INPUT_VALIDATORS[key][0](value, K)
+    ]
+    _report_failures(failures, is_strict)
+    # endregion
 
-        if key == 'X':
-            # if X is a reference file, skip validation. (X validation was already done upstream in this case)
-            if isinstance(value, str):
-                if '.json' in value:
-                    pass
-            else:
-                _validate_ndarray(value, np.ndarray)
-                (N, K) = value.shape
 
-                if N <= K:                
-                    raise ValueError("X: The number of observations (rows) must be greater than the number of variables (columns)")
+def validate_batch_inputs(is_strict:bool, function_type:PSRFunction, tasks:list, **shared):
+    """Validates the inputs of a batch of PSR tasks in one pass. Inputs
+    shared by every task (X, cov_inv, options, ...) are validated once
+    rather than for every task. Per-task inputs (y, theta, ...) are
+    validated with vectorized shape and dtype checks. Required inputs are
+    those of validate_inputs, checked for every task.
 
-                if y_N != N:
-                    raise ValueError("Inputs X and Y must have the same number of observations (rows)")
+    Parameters
+    ----------
+    is_strict : bool
+        True to raise ValueError on invalid inputs
+        False raises warnings on invalid inputs
+    function_type : PSRFunction
+        PSR Function type
+    tasks : list of dict
+        Per-task inputs, e.g. [{'y': y_q, 'theta': theta_q}, ...]. Keys
+        passed in shared are not expected in tasks.
+    **shared : Variable number of inputs
+        Inputs shared by every task: X, cov_inv, threshold, etc.
 
-        
-        # validate the rest of the arguments
-        validate_args.get(key, value)
-        
-        # # attribute_combi is a [1-by-K] vector of zeros and ones
-        if key == 'attribute_combi':
-            _validate_ndarray(value, cols=K)
-        
-        # # k = None or an int
-        if key == 'k':
-            _validate_numeric(value, min_value=1, max_value=K)
-        
-        
+    Returns
+    -------
+    list of str
+        Failure messages (empty if every input is valid), when not strict.
+
+    Raises
+    ------
+    ValueError
+        If any input is invalid (when is_strict), listing every failure.
+    Warning
+        If any input is invalid (when !is_strict)
+    """    
+
+    failures = []
+
+    # region Inputs Exist (in shared, or else in every task)
+    if is_strict and function_type not in _STRICT_INPUTS:
+        failures.append(f'Invalid function type {function_type}')
+
+    for key in _required_inputs(is_strict, function_type):
+        if key in shared:
+            continue
+        missing = [q for q, task in enumerate(tasks) if key not in task]
+        if not tasks:
+            failures.append(f'Missing input {key}')
+        elif missing:
+            failures.append(f'Missing input {key} in tasks [{_format_tasks(missing)}]')
+    task_keys = set().union(*tasks) if tasks else set()
     # endregion
 
-        
+    # region Shared Inputs (validated once)
+    N, K = None, None
+    X = shared.get('X')
+    if isinstance(X, np.ndarray):
+        if X.ndim == 2:
+            N, K = X.shape
+
+    for key, value in shared.items():
+        failures += _validate_value(key, value, K)
+    # endregion
+
+    # region Per-task Inputs (vectorized)
+    for key in sorted(task_keys):
+        index = [q for q, task in enumerate(tasks) if key in task]
+        values = [tasks[q][key] for q in index]
+        invalid = _invalid_tasks(key, values, N, K)
+
+        if invalid.size:
+            shown = _format_tasks([index[i] for i in invalid])
+            expected = _TASK_EXPECTATIONS.get(key, _INPUT_VALIDATORS.get(key, (None, 'invalid value'))[1])
+            failures.append(f'Invalid {key} in tasks [{shown}], {expected}'.format(N=_dim(N), K=_dim(K)))
+    # endregion
+
+    _report_failures(failures, is_strict)
+    return failures
+
+
+def _required_inputs(is_strict:bool, function_type:PSRFunction):
+    """Returns the inputs required by validate_inputs and
+    validate_batch_inputs: y, X and theta and, when is_strict, the
+    options of the function type."""
+    if is_strict:
+        return _REQUIRED_INPUTS + _STRICT_INPUTS.get(function_type, ())
+    return _REQUIRED_INPUTS
+
+
+def _format_tasks(index:list, max_shown:int=10):
+    """Formats task indices for failure messages, showing at most
+    max_shown of them."""
+    shown = ', '.join(str(q) for q in index[:max_shown])
+    more = f' and {len(index) - max_shown} more' if len(index) > max_shown else ''
+    return shown + more
+
+
+def _validate_value(key:str, value, K:int):
+    """Validates one input, returns its failure messages."""
+
+    failures = []
+    if key == 'X' and not isinstance(value, str):
+        if not (isinstance(value, np.ndarray) and value.ndim == 2 and value.dtype.kind in 'biuf'):
+            failures.append('Invalid X, expecting a 2d numeric numpy.ndarray.')
+        elif value.shape[0] <= value.shape[1]:
+            failures.append("X: The number of observations (rows) must be greater than the number of variables (columns)")
+    elif key in _INPUT_VALIDATORS and not _INPUT_VALIDATORS[key][0](value, K):
+        failures.append(f'Invalid {key}, {_INPUT_VALIDATORS[key][1]}'.format(K=_dim(K)))
+    return failures
+
+
+def _invalid_tasks(key:str, values:list, N:int, K:int):
+    """Returns the positions of the invalid per-task values of a key.
+    Shapes and dtypes of all the tasks are checked at once."""
+
+    if key not in _TASK_EXPECTATIONS:
+        # Generic inputs: run the validator of the key on every task
+        if key not in _INPUT_VALIDATORS:
+            return np.empty(0, dtype=int)
+        validator = _INPUT_VALIDATORS[key][0]
+        return np.flatnonzero([not validator(value, K) for value in values])
+
+    is_array = np.fromiter((isinstance(value, np.ndarray) for value in values), bool, len(values))
+    shapes = np.full((len(values), 2), -1)
+    sizes = np.full(len(values), -1)
+    numeric = np.zeros(len(values), dtype=bool)
+    for i in np.flatnonzero(is_array):
+        value = values[i]
+        if value.ndim == 2:
+            shapes[i] = value.shape
+        elif value.ndim == 1:
+            shapes[i] = (value.size, 1) if key == 'y' else (1, value.size)
+        sizes[i] = value.size
+        numeric[i] = value.dtype.kind in 'biuf'
+
+    if key == 'y':
+        # y is a column vector of length N
+        valid = (shapes[:, 1] == 1) & ((sizes == N) if N is not None else True)
+    else:
+        # theta is a row vector of length K
+        valid = (shapes[:, 0] == 1) & ((sizes == K) if K is not None else True)
+
+    return np.flatnonzero(~(is_array & numeric & valid))
+
+
+def _report_failures(failures:list, is_strict:bool):
+    """Raises (when is_strict) or warns about every failure at once."""
+    if failures:
+        response_str = '\n'.join(failures)
+        if is_strict:
+            raise ValueError(response_str)
+        warnings.warn(response_str, Warning)
+
+
+def _dim(size):
+    """Formats an expected dimension, ':' if unknown."""
+    return ':' if size is None else size
+
+
 def _check_key(kamus: dict, key:str, is_strict: bool = False):
     """Checks to see if a key exist in a dictionary
 
@@ -165,11 +309,11 @@ def _check_key(kamus: dict, key:str, is_strict: bool = False):
         response_str = f'Missing input {key}'
         
         if is_strict:
-            # Raise Warning exception with details
-            warnings.warn(response_str, Warning)
-        else:
             # Raise value exception with details
             raise ValueError(response_str)
+        else:
+            # Raise Warning exception with details
+            warnings.warn(response_str, Warning)
     
     return input_exist
 
@@ -215,12 +359,10 @@ def _validate_ndarray(obj, rows:int=None, cols:int=None,
                 valid_rows = False
                 valid_cols = False
                 
+                # Unspecified dimensions match any size
                 obj_dim = obj.shape
-                if rows is not None:
-                    valid_rows = (obj_dim[0] == rows)
-                
-                if cols is not None:
-                    valid_cols = (obj_dim[1] == cols)
+                valid_rows = rows is None or (len(obj_dim) > 0 and obj_dim[0] == rows)
+                valid_cols = cols is None or (len(obj_dim) > 1 and obj_dim[1] == cols)
                 
                 # Valid dimensions flag
                 valid_dim = valid_rows and valid_cols
@@ -258,9 +400,9 @@ def _validate_bool(obj, obj_name:str=None, allow_none:bool=True):
         return True
     else:
         if obj_name is not None:
-            if not isinstance(obj, bool):
+            if not isinstance(obj, (bool, np.bool_)):
                 warnings.warn(f'Invalid {obj_name}, expecting bool.' , Warning)    
-        return isinstance(obj, bool)
+        return isinstance(obj, (bool, np.bool_))
     
     
 def _validate_numeric(obj, min_value:float=None, max_value:float=None, 
@@ -291,7 +433,7 @@ def _validate_numeric(obj, min_value:float=None, max_value:float=None,
         return True
     else:
     
-        valid_type = isinstance(obj, (int, float)) or _validate_ndarray(obj, (1,1))
+        valid_type = isinstance(obj, (int, float, np.integer, np.floating)) or _validate_ndarray(obj, 1, 1)
         valid_range = True
         
         if valid_type:
@@ -352,6 +494,26 @@ def _validate_numeric_or_ndarray(obj, rows:int=None, cols:int=None,
         )
     
     
+def _validate_numeric_sequence(obj):
+    """Validates a non-empty list or tuple of int/float values (e.g. the
+    threshold option, or a numeric array serialized to JSON)."""
+    return (isinstance(obj, (list, tuple)) and len(obj) > 0
+            and all(isinstance(value, (int, float, np.integer, np.floating)) for value in obj))
+
+
+def _validate_matrix(obj, rows:int=None, cols:int=None, allow_none:bool=True):
+    """Validates a 2d ndarray, or a nested list of numbers (an ndarray
+    serialized to JSON), with optional expected dimensions."""
+    if isinstance(obj, list):
+        try:
+            obj = np.asarray(obj, dtype=np.float64)
+        except (TypeError, ValueError):
+            return False
+        if obj.ndim != 2:
+            return False
+    return bool(_validate_ndarray(obj, rows, cols, allow_none=allow_none))
+
+
 def _validate_str(obj, obj_name:str=None, allow_none:bool=True):
     """Validate string objects
 
@@ -379,6 +541,13 @@ def _validate_str(obj, obj_name:str=None, allow_none:bool=True):
 def is_full_rank(X):
     """Checks to see if a given matrix is full rank.
 
+    The result matches np.linalg.matrix_rank and is cached per X
+    checksum (see check_conditioning). The rank is read from the
+    eigenvalues of the K-by-K Gram matrix when they resolve it (every
+    singular value well above the matrix_rank tolerance), and otherwise,
+    for rank deficient or very ill-conditioned X, computed from an SVD of
+    X. See has_collinear_columns for the stricter collinearity check.
+
     Parameters
     ----------
     X : ndarray
@@ -390,18 +559,35 @@ def is_full_rank(X):
         True if X is full rank (no linearly dependent variables)
     """    
     
-    
-    # Calculate the rank of the matrix
-    rank = np.linalg.matrix_rank(X)
-    
-    # Determine the smallest dimension of the matrix
-    min_dim = min(X.shape)
-    
-    # Check if the matrix is full rank
-    return rank == min_dim
+    return check_conditioning(X)['numerically_full_rank']
+
 
+def has_collinear_columns(X, tol:float=DEFAULT_COLLINEARITY_TOL):
+    """Checks whether a column of X is (nearly) a linear combination of
+    the other columns: its residual variance ratio (1 - R^2) on them is
+    below tol. Stricter than is_full_rank, it also flags ill-conditioned
+    columns that np.linalg.matrix_rank treats as independent.
 
-def _check_missing_data(matrix:np.ndarray, threshold:float=0.80):
+    Parameters
+    ----------
+    X : ndarray
+        Matrix to evaluate.
+    tol : float, optional
+        Residual variance ratio under which a column is collinear, by
+        default DEFAULT_COLLINEARITY_TOL (1e-9).
+
+    Returns
+    -------
+    bool
+        True if X has collinear columns (see check_conditioning for
+        their indices).
+    """
+
+    return not check_conditioning(X, tol)['full_rank']
+
+
+def _check_missing_data(matrix:np.ndarray, threshold:float=0.80, in_place:bool=False,
+                        chunk_rows:int=None):
     """Checks for missing data for a given 2d matrix. This validator
     will also restore damaged columns if their missing data ratio is
     below a certain threshold.
@@ -410,22 +596,26 @@ def _check_missing_data(matrix:np.ndarray, threshold:float=0.80):
     ----------
     matrix : numpy.ndarray
         Matrix to check for missing data (and address as necessary).
+    threshold : float, optional
+        Missing data ratio per column, by default 0.80
+    in_place : bool, optional
+        Restore the matrix in place instead of returning a restored copy,
+        by default False.
+    chunk_rows : int, optional
+        Number of rows scanned at a time (e.g. for a memory-mapped
+        matrix), by default None (automatic).
 
     Returns
     -------
-    bool    
-        True if missing data of any kind (except empty which is handled downstream)
-        False if checks pass.
+    numpy.ndarray
+        Matrix, restored if it had missing data (except empty which is
+        handled downstream).
     """
 
-    # Check for None values and turn them into NaN so we can use built-in Numpy features
-    if np.any(matrix == None):
-        # Replace None or null values with np.nan
-        matrix = np.where(matrix == None, np.nan, matrix)    
-
-    # Check for NaN values
-    if np.any(np.isnan(matrix)):
-        return _restore_data(matrix=matrix, threshold=threshold)
+    # Float matrices cannot hold None: scan for NaN only, block by block
+    if has_missing(matrix, chunk_rows):
+        return impute_column_means(matrix, threshold=threshold, chunk_rows=chunk_rows,
+                                   in_place=in_place)
 
     # If all checks pass, return matrix without restoring
     return matrix
@@ -454,30 +644,37 @@ def _restore_data(matrix:np.ndarray, threshold:float=0.80):
     ValueError
         If ratio of missing data per column exceeds the tolerance threshold.
     """    
-    
-    
-    # Constants for restoring data
-    observations, cols = matrix.shape
-
-    # Create a boolean matrix missing Nan
-    missing_values = np.isnan(matrix)
-    missing_counts = np.sum(missing_values, axis=0) # Count missing values for each column
-
-    # Calculate the damage percent for each column
-    damage_percent = missing_counts / observations
-
-    # Find columns with damage that crosses threshold. 
-    high_damage_columns = np.where(damage_percent > threshold)[0] # Index 0 accesses index array of columns from np.where
-
-    # Raise warning for columns with significant damage
-    if high_damage_columns.size > 0:
-        raise ValueError(f"Columns at indices: {str(high_damage_columns)} have significant amounts of missing data")
-
-    # Compute column averages, ignoring NaN values
-    column_averages = np.nanmean(matrix, axis=0)
-
-    # Replace missing values with column averages
-    matrix = np.where(missing_values, column_averages, matrix)
-        
-    # Return restored matrix
-    return matrix
+    return impute_column_means(matrix, threshold=threshold, in_place=False)
+
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark: validate_inputs once per task versus one batch validation,
+    # Q tasks sharing the same X
+    Q, N, K = 10_000, 1_000, 20
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((N, K))
+    y_matrix = rng.standard_normal((N, Q))
+    theta_matrix = rng.standard_normal((Q, K))
+    tasks = [{'y': y_matrix[:, [q]], 'theta': theta_matrix[[q], :]} for q in range(Q)]
+    options = {'cov_inv': None, 'threshold': 0.5, 'most_eval': True,
+               'eval_type': 'both', 'is_threshold_percent': True}
+
+    start_time = time.perf_counter()
+    for task in tasks:
+        validate_inputs(False, PSRFunction.PSR, X=X, **task, **options)
+    per_task_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    validate_batch_inputs(True, PSRFunction.PSR, tasks, X=X, **options)
+    batch_time = time.perf_counter() - start_time
+
+    print(f"Q={Q}: per task {per_task_time:.3f}s, batch {batch_time:.3f}s")
+
+    # Every failure is reported at once
+    tasks[3]['theta'] = theta_matrix[[3], :-1]
+    tasks[7]['y'] = None
+    del tasks[9]['y']
+    failures = validate_batch_inputs(False, PSRFunction.PSR, tasks, X=X, **{**options, 'most_eval': 'yes'})
+    print('\n'.join(failures))
@@ -0,0 +1,348 @@
+
+# Standard library imports
+import hashlib # To derive cache keys
+import json # To fingerprint options
+import os # To locate and manage the cache directory
+import pickle # To store results on disk
+import tempfile # To write entries atomically
+import threading # To guard the in-memory index
+from collections import OrderedDict # LRU index of the entries
+
+# Third-party library imports
+import numpy as np # For numerical computations and array operations
+
+# Local application / library-specific imports
+from csa_common_lib.helpers._arrays import ArrayReference
+from csa_common_lib.helpers._conversions import transform_tree
+from csa_common_lib.helpers._os import calc_array_checksum
+
+
+# Environment variable overriding the default cache directory
+CACHE_DIR_ENV = 'CSA_CACHE_DIR'
+
+# Default cache directory, when CSA_CACHE_DIR is not set
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'csa_common_lib', 'results')
+
+# Default size bound of the cache on disk, in bytes
+DEFAULT_MAX_BYTES = 1 << 30
+
+# File extension of the cache entries
+ENTRY_EXTENSION = '.pkl'
+
+
+class ResultCache:
+    """Local, content-addressed cache of prediction results stored on
+    disk. Entries are keyed on the model type, a fingerprint of the
+    prediction options and the checksums of the inputs (as computed by
+    PredictionReceipt), so repeat predictions with identical inputs and
+    options can be answered without dispatching them again. The least
+    recently used entries are evicted once the cache exceeds max_bytes.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Directory of the cache entries, by default the CSA_CACHE_DIR
+        environment variable, or ~/.cache/csa_common_lib/results.
+    max_bytes : int, optional
+        Size bound of the cache on disk, by default DEFAULT_MAX_BYTES (1 GiB).
+
+    Examples
+    --------
+    >>> cache = ResultCache()
+    >>> key = make_cache_key('psr', options, y, X, theta)
+    >>> yhat, yhat_details = cache.get_or_compute(key, lambda: run_prediction(y, X, theta, options))
+    >>> cache.stats()
+    {'hits': 0, 'misses': 1, 'evictions': 0, 'entries': 1, 'bytes': 52931}
+    """
+
+    def __init__(self, cache_dir:str=None, max_bytes:int=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # entry size by key, least recently used first
+        self._total_bytes = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+
+    def get(self, key:str, default=None):
+        """Returns the cached results of a key.
+
+        Parameters
+        ----------
+        key : str
+            Cache key, see make_cache_key.
+        default : any, optional
+            Value returned on a cache miss, by default None.
+
+        Returns
+        -------
+        any
+            The cached results, or default.
+        """
+
+        with self._lock:
+            if key in self._entries:
+                try:
+                    with open(self._path(key), 'rb') as f:
+                        value = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    # Entry removed or corrupted by another process
+                    self._forget(key)
+                else:
+                    self._entries.move_to_end(key)
+                    self._touch(key)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return default
+
+
+    def put(self, key:str, value):
+        """Stores results in the cache, evicting the least recently used
+        entries if the cache exceeds max_bytes. Values larger than
+        max_bytes are not stored.
+
+        Parameters
+        ----------
+        key : str
+            Cache key, see make_cache_key.
+        value : any
+            Picklable results, e.g. (yhat, yhat_details).
+        """
+
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            # Write to a temporary file first, so readers never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+
+            self._forget(key, remove_file=False)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+
+    def get_or_compute(self, key:str, compute):
+        """Returns the cached results of a key, or computes, stores and
+        returns them on a cache miss.
+
+        Parameters
+        ----------
+        key : str
+            Cache key, see make_cache_key.
+        compute : callable
+            Function without arguments returning the results.
+
+        Returns
+        -------
+        any
+            The cached or computed results.
+        """
+
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+
+    def __contains__(self, key:str):
+        with self._lock:
+            return key in self._entries
+
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+    def remove(self, key:str):
+        """Removes the entry of a key, if cached.
+
+        Parameters
+        ----------
+        key : str
+            Cache key.
+        """
+        with self._lock:
+            self._forget(key)
+
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            for key in list(self._entries):
+                self._forget(key)
+            self.hits = self.misses = self.evictions = 0
+
+
+    def stats(self):
+        """Returns the hit/miss counters and the size of the cache.
+
+        Returns
+        -------
+        dict
+            'hits', 'misses', 'evictions', 'entries' and 'bytes'.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+            }
+
+
+    def _path(self, key:str):
+        return os.path.join(self.cache_dir, key + ENTRY_EXTENSION)
+
+
+    def _load_index(self):
+        """Indexes the entries already on disk, least recently used first
+        (by modification time, refreshed on every hit)."""
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(ENTRY_EXTENSION):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, name[:-len(ENTRY_EXTENSION)], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+
+    def _touch(self, key:str):
+        """Records an access in the entry's modification time, so the LRU
+        order survives across processes."""
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+
+    def _forget(self, key:str, remove_file:bool=True):
+        """Drops an entry from the index (and from disk)."""
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+        if remove_file:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+
+    def _evict(self):
+        """Removes least recently used entries until the cache fits max_bytes."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            self._forget(next(iter(self._entries)))
+            self.evictions += 1
+
+
+def fingerprint_options(options):
+    """Returns a stable fingerprint of prediction options. Numeric arrays
+    and lists (e.g. cov_inv, threshold) are represented by the checksum
+    of their float64 values, so options converted to lists (as stored in
+    a PredictionReceipt) have the same fingerprint as the originals.
+    Lazy references (e.g. a CovInvReference cov_inv) are resolved first,
+    as receipts resolve them, so both give the same fingerprint.
+
+    Parameters
+    ----------
+    options : PredictionOptions or dict
+        Prediction options, or their options dictionary.
+
+    Returns
+    -------
+    str
+        Hex string fingerprint.
+    """
+
+    options = getattr(options, 'options', options)
+    options = transform_tree(options, [
+        ((np.ndarray, list, tuple), _array_fingerprint),
+        (ArrayReference, lambda reference: _array_fingerprint(reference.resolve())),
+    ])
+
+    payload = json.dumps(options, sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _array_fingerprint(value):
+    """Leaf rule of fingerprint_options: checksum of numeric arrays and lists."""
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        # Ragged list
+        return NotImplemented
+    if array.dtype.kind not in 'biuf' or (array.size == 0 and not isinstance(value, np.ndarray)):
+        return NotImplemented
+    return {'__array__': calc_array_checksum(array.astype(np.float64, copy=False))}
+
+
+def make_cache_key(model_type, options, y=None, X=None, theta=None, *,
+                   y_checksum:str=None, X_checksum:str=None, theta_checksum:str=None):
+    """Returns the content-addressed cache key of a prediction request.
+    Inputs are passed either as arrays or as precomputed checksums.
+
+    Parameters
+    ----------
+    model_type : str
+        Prediction model that is run.
+    options : PredictionOptions or dict
+        Prediction options, or their options dictionary.
+    y, X, theta : ndarray, optional
+        Prediction inputs.
+    y_checksum, X_checksum, theta_checksum : str, optional
+        Checksums of the inputs (calc_array_checksum), used instead of
+        the arrays.
+
+    Returns
+    -------
+    str
+        Hex string cache key.
+    """
+
+    checksums = [
+        checksum if checksum is not None else (None if array is None else calc_array_checksum(array))
+        for array, checksum in ((y, y_checksum), (X, X_checksum), (theta, theta_checksum))
+    ]
+
+    payload = json.dumps([str(model_type), fingerprint_options(options), checksums])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def receipt_cache_key(receipt):
+    """Returns the cache key of the request a PredictionReceipt was
+    issued for, reusing the checksums it already computed.
+
+    Parameters
+    ----------
+    receipt : PredictionReceipt
+        Receipt of a prediction.
+
+    Returns
+    -------
+    str
+        Hex string cache key.
+    """
+    return make_cache_key(receipt.model_type, receipt.options,
+                          y_checksum=receipt.y_checksum,
+                          X_checksum=receipt.X_checksum,
+                          theta_checksum=receipt.theta_checksum)
@@ -15,14 +15,18 @@ def class_obj_to_dict(obj):
     -------
     dict
         A dictionary containing the attributes and their values of the class 
-        object. If the object has a `__dict__` attribute, it directly returns 
-        `obj.__dict__`. Otherwise, it inspects the object's attributes and 
-        returns a dictionary of attribute names and values, excluding private 
+        object. If the object defines a `to_dict` method (e.g. lazily
+        materialized attributes), it returns its result. If the object has
+        a `__dict__` attribute, it directly returns `obj.__dict__`. Otherwise,
+        it inspects the object's attributes and returns a dictionary of attribute names and values, excluding private 
         or protected attributes (those starting with an underscore).
     """
     
     
-    if hasattr(obj, '__dict__'):
+    if callable(getattr(type(obj), 'to_dict', None)):
+        # The object builds its own attributes dictionary.
+        return obj.to_dict()
+    elif hasattr(obj, '__dict__'):
         # If the object has a __dict__ attribute, return it directly.
         return obj.__dict__
     else:
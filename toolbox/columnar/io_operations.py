@@ -0,0 +1,501 @@
+# Standard library imports
+import bz2
+import json
+import lzma
+import os
+import struct
+import zlib
+
+# Third-party imports
+import numpy as np
+
+
+# File layout
+# -----------
+# [8 bytes]  magic and format version
+# [8 bytes]  header length (little-endian uint64)
+# [n bytes]  JSON header: column descriptors (name, dtype, shape, offset,
+#            size, codec) and free-form metadata
+# [...]      column data, every column aligned on COLUMN_ALIGNMENT bytes.
+#            Uncompressed columns are raw C-ordered array buffers, so they
+#            can be memory-mapped.
+MAGIC = b'CSACOL\x00\x01'
+COLUMN_ALIGNMENT = 64
+FILE_EXTENSION = '.csac'
+
+# Supported column codecs: (compress, decompress)
+CODECS = {
+    'none': None,
+    'zlib': (lambda data, level: zlib.compress(data, 6 if level is None else level), zlib.decompress),
+    'bz2': (lambda data, level: bz2.compress(data, 9 if level is None else level), bz2.decompress),
+    'lzma': (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+
+
+def save_to_columnar(filename: str = None, meta: dict = None, compression=None,
+                     compresslevel: int = None, **columns) -> str:
+    """
+    Saves arrays to a binary columnar `.csac` file.
+
+    Parameters
+    ----------
+    filename : str, optional
+        The name of the file to save the data in. If not provided, defaults to None.
+    meta : dict, optional
+        JSON-serializable metadata stored in the header. Default is None.
+    compression : str or dict, optional
+        Codec of every column ('none', 'zlib', 'bz2' or 'lzma'), or a dictionary
+        of codecs by column name. Default is None (uncompressed, memory-mappable).
+    compresslevel : int, optional
+        Compression level passed to the codec. Default is None (codec default).
+    **columns : ndarray
+        Columns to save, passed as keyword arguments. Object arrays are not
+        supported.
+
+    Returns
+    -------
+    str
+        The name of the saved file.
+
+    Raises
+    ------
+    ValueError
+        If `filename` is not provided, or a codec is not supported.
+    TypeError
+        If a column is an object array.
+    """
+
+    if not filename:
+        raise ValueError("Filename must be provided to save the data.")
+
+    # Ensure the filename ends with '.csac'
+    if not filename.endswith(FILE_EXTENSION):
+        filename += FILE_EXTENSION
+
+    # Serialize (and compress) every column
+    descriptors = []
+    payloads = []
+    for name, value in columns.items():
+        array = np.ascontiguousarray(value)
+        if array.dtype.hasobject:
+            raise TypeError(f"Column '{name}' is an object array and cannot be stored.")
+
+        codec = _column_codec(compression, name)
+        if codec == 'none':
+            # Byte view of the buffer (memoryview cannot cast datetime64/timedelta64)
+            payload = array.reshape(-1).view(np.uint8) if array.size else b''
+        else:
+            payload = CODECS[codec][0](array.tobytes(), compresslevel)
+
+        descriptors.append({
+            'name': name,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'codec': codec,
+            'nbytes': payload.nbytes if isinstance(payload, np.ndarray) else len(payload),
+        })
+        payloads.append(payload)
+
+    # Lay the columns out after the header. The offsets depend on the header
+    # size and vice versa, so grow the data start until the header fits.
+    header = {'columns': descriptors, 'meta': meta or {}}
+    data_start = _align(len(MAGIC) + 8)
+    while True:
+        offset = data_start
+        for descriptor in descriptors:
+            descriptor['offset'] = offset
+            offset = _align(offset + descriptor['nbytes'])
+
+        header_bytes = json.dumps(header, default=_json_default).encode('utf-8')
+        if len(MAGIC) + 8 + len(header_bytes) <= data_start:
+            break
+        data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    with open(filename, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+
+        for descriptor, payload in zip(descriptors, payloads):
+            f.write(b'\x00' * (descriptor['offset'] - f.tell()))
+            f.write(payload)
+
+    return filename
+
+
+def load_columnar(file_path: str, mmap: bool = True, columns: list = None):
+    """
+    Loads a binary columnar `.csac` file.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the `.csac` file.
+    mmap : bool, optional
+        Memory-map the uncompressed columns (read-only) instead of reading
+        them into memory. Default is True.
+    columns : list of str, optional
+        Names of the columns to load. Default is None (all columns).
+
+    Returns
+    -------
+    data : dict
+        Arrays by column name.
+    meta : dict
+        Metadata stored in the header.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a columnar file.
+    """
+
+    header = read_columnar_header(file_path)
+
+    data = {}
+    with open(file_path, 'rb') as f:
+        for descriptor in header['columns']:
+            name = descriptor['name']
+            if columns is not None and name not in columns:
+                continue
+
+            dtype = np.dtype(descriptor['dtype'])
+            shape = tuple(descriptor['shape'])
+
+            if descriptor['codec'] == 'none' and mmap and descriptor['nbytes'] > 0:
+                data[name] = np.memmap(file_path, dtype=dtype, mode='r',
+                                       offset=descriptor['offset'], shape=shape)
+                continue
+
+            f.seek(descriptor['offset'])
+            if descriptor['codec'] == 'none':
+                data[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+            else:
+                payload = CODECS[descriptor['codec']][1](f.read(descriptor['nbytes']))
+                data[name] = np.frombuffer(bytearray(payload), dtype=dtype).reshape(shape)
+
+    return data, header['meta']
+
+
+def read_columnar_header(file_path: str) -> dict:
+    """
+    Reads the header of a binary columnar `.csac` file without loading any column.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the `.csac` file.
+
+    Returns
+    -------
+    dict
+        Header with the 'columns' descriptors (name, dtype, shape, offset,
+        nbytes, codec) and the 'meta' dictionary.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a columnar file.
+    """
+
+    with open(file_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{file_path}' is not a columnar (.csac) file.")
+
+        (header_size,) = struct.unpack('<Q', f.read(8))
+        return json.loads(f.read(header_size).decode('utf-8'))
+
+
+def pack_records(records: list):
+    """
+    Converts a list of dictionaries (e.g. per-task prediction results) into
+    typed columns.
+
+    Values of a key are stored as one column: homogeneous arrays and scalars are
+    stacked into a single array, numeric arrays of different shapes or dtypes
+    are concatenated into a flat array with their shapes (and dtypes) kept in
+    the layout, and any other JSON-serializable values are kept in the layout.
+    None values (e.g. outputs of failed tasks) are recorded in a null mask, so
+    the other values of the key are still stored as an array. Python scalars,
+    numpy scalars and arrays are restored with their original types.
+
+    Parameters
+    ----------
+    records : list of dict
+        Records to pack.
+
+    Returns
+    -------
+    columns : dict
+        Arrays by column name.
+    layout : dict
+        JSON-serializable description of the columns, used by `unpack_records`.
+    """
+
+    num_records = len(records)
+    keys = list(dict.fromkeys(key for record in records for key in record))
+
+    columns = {}
+    layout = {'num_records': num_records, 'keys': {}}
+    for key in keys:
+        index = [q for q, record in enumerate(records) if key in record]
+        values = [records[q][key] for q in index]
+        spec = {} if len(index) == num_records else {'index': index}
+
+        nulls = [i for i, value in enumerate(values) if value is None]
+        if nulls:
+            spec['nulls'] = nulls
+            values = [value for value in values if value is not None]
+
+        arrays = [np.asarray(value) for value in values] if _is_typed(values) else None
+
+        if arrays is not None:
+            # Type of every value: ndarray, python scalar or numpy scalar
+            spec['types'] = ''.join(
+                'a' if isinstance(value, np.ndarray) else 'g' if isinstance(value, np.generic) else 's'
+                for value in values
+            )
+
+        if arrays is not None and len({(array.shape, array.dtype) for array in arrays}) == 1:
+            # Homogeneous arrays or scalars: one stacked array
+            columns[key] = np.stack(arrays)
+            spec['kind'] = 'stacked'
+        elif arrays is not None:
+            # Ragged arrays: one flat array and the shape of every value
+            columns[key] = np.concatenate([array.ravel() for array in arrays])
+            spec['kind'] = 'ragged'
+            spec['shapes'] = [list(array.shape) for array in arrays]
+            if any(array.dtype != columns[key].dtype for array in arrays):
+                spec['dtypes'] = [array.dtype.str for array in arrays]
+        else:
+            # Anything else is stored in the layout
+            spec['kind'] = 'json'
+            spec['values'] = json.loads(json.dumps(values, default=_json_default))
+
+        layout['keys'][key] = spec
+
+    return columns, layout
+
+
+def unpack_records(columns: dict, layout: dict) -> list:
+    """
+    Rebuilds the list of dictionaries packed by `pack_records`.
+
+    Parameters
+    ----------
+    columns : dict
+        Arrays by column name.
+    layout : dict
+        Description of the columns returned by `pack_records`.
+
+    Returns
+    -------
+    list of dict
+        The records. Stacked values are views of the columns.
+    """
+
+    records = [{} for _ in range(layout['num_records'])]
+
+    for key, spec in layout['keys'].items():
+        index = spec.get('index', range(layout['num_records']))
+
+        if spec['kind'] == 'stacked':
+            column = columns[key]
+            values = list(column)
+        elif spec['kind'] == 'ragged':
+            column = columns[key]
+            dtypes = spec.get('dtypes')
+            values = []
+            start = 0
+            for i, shape in enumerate(spec['shapes']):
+                size = int(np.prod(shape))
+                value = column[start:start + size].reshape(shape)
+                values.append(value.astype(dtypes[i]) if dtypes else value)
+                start += size
+        else:
+            values = spec['values']
+
+        if 'types' in spec:
+            values = [_restore_type(value, kind) for value, kind in zip(values, spec['types'])]
+
+        for i in spec.get('nulls', []):
+            values.insert(i, None)
+
+        for q, value in zip(index, values):
+            records[q][key] = value
+
+    return records
+
+
+def _restore_type(value: np.ndarray, kind: str):
+    """Restores a packed value as an ndarray ('a'), numpy scalar ('g') or
+    python scalar ('s')."""
+    if kind == 'g':
+        return value[()]
+    if kind == 's':
+        return value.item()
+    return np.asarray(value)
+
+
+def _is_typed(values: list) -> bool:
+    """Checks whether every value is a numeric, bool or datetime scalar or
+    non-object ndarray."""
+    for value in values:
+        if isinstance(value, np.ndarray):
+            if value.dtype.hasobject or value.dtype.kind not in 'biufcmM':
+                return False
+        elif not isinstance(value, (bool, int, float, complex, np.number, np.bool_,
+                                    np.datetime64, np.timedelta64)):
+            return False
+    return len(values) > 0
+
+
+def _column_codec(compression, name: str) -> str:
+    """Resolves the codec of a column."""
+    codec = compression.get(name) if isinstance(compression, dict) else compression
+    codec = 'none' if codec is None else codec
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported compression '{codec}'. Choose from {list(CODECS)}.")
+    return codec
+
+
+def _json_default(obj):
+    """JSON fallback for numpy values stored in the header."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, tuple):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _align(offset: int) -> int:
+    """Rounds an offset up to the column alignment."""
+    return -(-offset // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+
+
+if __name__ == "__main__":
+    import time
+    from csa_common_lib.classes.float32_encoder import Float32Encoder
+    from csa_common_lib.toolbox.npz.io_operations import load_npz, save_to_npz
+
+    # Benchmark: Q prediction results with N-long weights, relevance and similarity
+    Q, N = 200, 5_000
+    rng = np.random.default_rng(0)
+    records = [
+        {
+            'yhat': rng.standard_normal((1, 1)),
+            'weights': rng.standard_normal((1, N)),
+            'relevance': rng.standard_normal((N, 1)),
+            'similarity': rng.standard_normal((N, 1)),
+            'fit': rng.standard_normal((1, 1)),
+        }
+        for _ in range(Q)
+    ]
+
+    def _timed(label, write, read):
+        start_time = time.perf_counter()
+        path = write()
+        write_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        read(path)
+        read_time = time.perf_counter() - start_time
+        print(f"{label}: write {write_time:.3f}s, read {read_time:.3f}s, "
+              f"{os.path.getsize(path) / 1e6:.1f} MB")
+
+    def _write_json():
+        with open('bench_results.json', 'w') as f:
+            Float32Encoder().dump(records, f)
+        return 'bench_results.json'
+
+    def _read_json(path):
+        with open(path) as f:
+            json.load(f)
+
+    _timed('json', _write_json, _read_json)
+    _timed('npz', lambda: save_to_npz('bench_results', records=records),
+           lambda path: load_npz(path).close())
+
+    for codec in ('none', 'zlib'):
+        def _write_columnar():
+            columns, layout = pack_records(records)
+            return save_to_columnar('bench_results', meta={'layout': layout},
+                                    compression=codec, **columns)
+
+        def _read_columnar(path):
+            data, meta = load_columnar(path)
+            unpack_records(data, meta['layout'])
+
+        _timed(f'columnar ({codec})', _write_columnar, _read_columnar)
+
+    for path in ('bench_results.json', 'bench_results.npz', 'bench_results.csac'):
+        os.remove(path)
+
+    # Round trips: values come back with their types, shapes and dtypes
+    from csa_common_lib.classes.prediction_results import PredictionResults
+
+    def _assert_same(loaded, saved, path=''):
+        assert type(loaded) is type(saved) or (
+            isinstance(saved, np.ndarray) and isinstance(loaded, np.ndarray)
+        ), f"{path}: {type(loaded).__name__} != {type(saved).__name__}"
+        if isinstance(saved, dict):
+            assert loaded.keys() == saved.keys(), f"{path}: keys {list(loaded)} != {list(saved)}"
+            for key in saved:
+                _assert_same(loaded[key], saved[key], f"{path}.{key}")
+        elif isinstance(saved, list):
+            assert len(loaded) == len(saved), f"{path}: length {len(loaded)} != {len(saved)}"
+            for i, (loaded_item, saved_item) in enumerate(zip(loaded, saved)):
+                _assert_same(loaded_item, saved_item, f"{path}[{i}]")
+        elif isinstance(saved, (np.ndarray, np.generic)):
+            assert loaded.dtype == saved.dtype, f"{path}: dtype {loaded.dtype} != {saved.dtype}"
+            assert np.shape(loaded) == np.shape(saved), f"{path}: shape {np.shape(loaded)} != {np.shape(saved)}"
+            assert np.array_equal(loaded, saved), f"{path}: values differ"
+        else:
+            assert loaded == saved, f"{path}: {loaded!r} != {saved!r}"
+
+    cases = {
+        'homogeneous': records[:3],
+        'failed task': [
+            {'yhat': np.array([[1.0]]), 'fit': np.float64(0.5), 'status': 'ok', 'error': None},
+            {'yhat': None, 'fit': None, 'status': 'failed', 'error': 'Singular matrix'},
+            {'yhat': np.array([[3.0]]), 'fit': np.float64(0.7), 'status': 'ok', 'error': None},
+        ],
+        'scalar types': [
+            {'n': 1, 'x': np.float64(1.5), 'flag': True, 'i': np.int32(7)},
+            {'n': 2, 'x': 2.5, 'flag': np.bool_(False), 'i': np.int64(8)},
+        ],
+        'ragged': [
+            {'weights': np.arange(3.0).reshape(1, 3), 'combi': np.ones((2, 2), dtype=np.int8)},
+            {'weights': np.arange(5.0).reshape(1, 5), 'combi': np.zeros((2, 2), dtype=np.float32)},
+        ],
+        'datetime': [
+            {'date': np.datetime64('2024-01-02'), 'lag': np.array([1, 2], dtype='timedelta64[D]')},
+            {'date': np.datetime64('2024-01-03'), 'lag': np.array([3, 4], dtype='timedelta64[D]')},
+        ],
+        'missing keys': [{'a': np.ones(2)}, {'b': 'text'}, {'a': np.zeros(2), 'b': [1, 'x']}],
+    }
+
+    for codec in ('none', 'zlib'):
+        for mmap in (True, False):
+            for name, saved in cases.items():
+                columns, layout = pack_records(saved)
+                path = save_to_columnar('roundtrip', meta={'layout': layout},
+                                        compression=codec, **columns)
+                data, meta = load_columnar(path, mmap=mmap)
+                _assert_same(unpack_records(data, meta['layout']), saved, name)
+
+            # Raw datetime64 / timedelta64 columns
+            saved = {'dates': np.arange('2024-01', '2024-03', dtype='datetime64[D]'),
+                     'lags': np.arange(4, dtype='timedelta64[s]').reshape(2, 2)}
+            data, _ = load_columnar(save_to_columnar('roundtrip', compression=codec, **saved), mmap=mmap)
+            _assert_same({key: np.asarray(value) for key, value in data.items()}, saved, 'columns')
+
+    # PredictionResults with a failed task
+    results = PredictionResults(cases['failed task'])
+    loaded = PredictionResults.load_columnar(results.save_columnar('roundtrip'))
+    _assert_same(loaded.raw_data, results.raw_data, 'PredictionResults')
+    assert isinstance(loaded.fit[0], np.float64) and loaded.fit[1] is None
+
+    os.remove('roundtrip.csac')
+    print("Round trips: ok")
@@ -1,14 +1,34 @@
 
+# Standard library imports
+import functools # To wrap the dispatcher with a timer
+import pickle # To measure the task payload size
+import time # To measure the task latency
+
 # Third-party library imports
 import numpy as np  # Third-party library import
-import time # Third-party library import
 
 # Local application / library-specific imports
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor  # For parallel processing
+from concurrent.futures import wait, FIRST_COMPLETED  # For streaming completed tasks
+from concurrent.futures.process import BrokenProcessPool  # For warm pool recovery
 from csa_common_lib.toolbox import _notifier # For notification handling
-from csa_common_lib.toolbox.concurrency.parallel_helpers import get_results_progress
+from csa_common_lib.toolbox.concurrency.parallel_helpers import get_chunksize
+from csa_common_lib.toolbox.concurrency.shared_arrays import share_inputs
+from csa_common_lib.toolbox.concurrency.worker_pool import get_worker_pool
+from csa_common_lib.toolbox.concurrency.worker_pool import shutdown as shutdown_worker_pool
+from csa_common_lib.toolbox.concurrency.worker_sizing import (
+    DEFAULT_BLAS_THREADS,
+    limit_blas_threads
+)
+from csa_common_lib.toolbox.concurrency.result_polling import (
+    iter_poll_results,
+    poll_results,
+    POLL_TIMEOUT
+)
 
-def run_tasks_local(inputs, dispatcher, max_workers:int, notifier):
+def run_tasks_local(inputs, dispatcher, max_workers:int, notifier,
+                    shared_memory:bool=False, chunksize='auto', reuse_pool:bool=False,
+                    blas_threads:int=DEFAULT_BLAS_THREADS, initializer=None, initargs=()):
     """
     Generic function to run parallel tasks using the provided dispatcher.
 
@@ -22,6 +42,32 @@ def run_tasks_local(inputs, dispatcher, max_workers:int, notifier):
         Maximum number of workers to use in the ProcessPoolExecutor.
     notifier : object
         Notifier object to manage notifications and state.
+    shared_memory : bool, optional
+        Publish large ndarray arguments (e.g. X) to shared memory once
+        and pass SharedArrayHandle objects to the workers instead of
+        pickling the arrays into every task, by default False. The
+        dispatcher must resolve the handles with resolve_shared
+        (slice_matrices resolves y_matrix and theta_matrix, not X).
+    chunksize : int or 'auto', optional
+        Number of tasks sent to a worker per round trip. 'auto' times a
+        first round of tasks and sizes the chunks from the measured
+        per-task latency and payload size, by default 'auto'.
+    reuse_pool : bool, optional
+        Run the tasks on the module-level warm worker pool (see
+        worker_pool.get_worker_pool) instead of creating and tearing
+        down a pool for this call, by default False.
+    blas_threads : int, optional
+        Cap the BLAS threads of every worker, so workers x BLAS threads
+        matches the sizing of get_process_limit, by default
+        DEFAULT_BLAS_THREADS (1). None leaves the workers uncapped.
+    initializer : callable, optional
+        Function run once in every worker at start-up, by default None.
+        E.g. worker_pool.preload_shared attaches a shared X once per
+        worker, and the dispatcher reads it with get_preloaded. With
+        reuse_pool, the warm pool is recreated when initializer or
+        initargs change.
+    initargs : tuple, optional
+        Arguments passed to initializer, by default ().
 
     Returns
     -------
@@ -36,9 +82,29 @@ def run_tasks_local(inputs, dispatcher, max_workers:int, notifier):
     n_state = notifier.get_notifier_status()
     notifier.disable_notifier()
 
+    # Replace large arrays by shared memory handles
+    publisher = None
+    if shared_memory:
+        inputs, publisher = share_inputs(inputs)
+
     # Execute tasks in multi-threaded pool
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        results = list(executor.map(dispatcher, inputs))
+    try:
+        if reuse_pool:
+            executor = get_worker_pool(max_workers, preload_modules=(dispatcher.__module__,),
+                                       initializer=initializer, initargs=initargs,
+                                       blas_threads=blas_threads)
+            try:
+                results = _map_tasks(executor, dispatcher, inputs, max_workers, chunksize)
+            except BrokenProcessPool:
+                # Do not hand a broken pool to the next batch
+                shutdown_worker_pool(wait=False)
+                raise
+        else:
+            with _process_pool(max_workers, blas_threads, initializer, initargs) as executor:
+                results = _map_tasks(executor, dispatcher, inputs, max_workers, chunksize)
+    finally:
+        if publisher is not None:
+            publisher.release()
 
     # Restore notifier state
     notifier.set_notifier_status(n_state)
@@ -52,7 +118,156 @@ def run_tasks_local(inputs, dispatcher, max_workers:int, notifier):
     return yhat, yhat_details
 
 
-def run_tasks_api(inputs, dispatcher, get_results_dispatcher, max_workers:int, notifier):
+def _process_pool(max_workers:int, blas_threads:int, initializer=None, initargs=()):
+    """Creates a process pool whose workers cap their BLAS threads to
+    blas_threads (None: no cap), then run initializer(*initargs). The cap
+    is applied by the worker initializer, the environment of this
+    process is left unchanged."""
+    if blas_threads is None and initializer is None:
+        return ProcessPoolExecutor(max_workers=max_workers)
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_worker,
+                               initargs=(blas_threads, initializer, tuple(initargs)))
+
+
+def _initialize_worker(blas_threads:int, initializer, initargs:tuple):
+    """Worker initializer of _process_pool."""
+    if blas_threads is not None:
+        limit_blas_threads(blas_threads)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _map_tasks(executor, dispatcher, inputs, max_workers:int, chunksize):
+    """Maps the dispatcher over the inputs with the requested chunk size
+    ('auto' or an int). Returns the results in the order of inputs.
+    """
+    if chunksize == 'auto':
+        return _map_adaptive(executor, dispatcher, list(inputs), max_workers)
+    return list(executor.map(dispatcher, inputs, chunksize=chunksize))
+
+
+def _map_adaptive(executor, dispatcher, inputs:list, max_workers:int):
+    """Maps the dispatcher over the inputs with an adaptive chunk size.
+    A first round of max_workers tasks is timed one by one, the rest of
+    the tasks are sent in chunks sized with get_chunksize.
+
+    Parameters
+    ----------
+    executor : ProcessPoolExecutor
+        Pool executing the tasks.
+    dispatcher : callable
+        The dispatcher function that will handle each task.
+    inputs : list of tuples
+        List of arguments to be passed to the dispatcher function.
+    max_workers : int
+        Number of workers in the pool.
+
+    Returns
+    -------
+    list
+        Results of the dispatcher, in the order of inputs.
+    """
+
+
+    # Small batches are not worth calibrating
+    if len(inputs) <= 2 * max_workers:
+        return list(executor.map(dispatcher, inputs))
+
+    # Time a first round of tasks inside the workers
+    probe = list(executor.map(functools.partial(_timed_dispatch, dispatcher),
+                              inputs[:max_workers]))
+    task_seconds = float(np.median([elapsed for _, elapsed in probe]))
+    payload_bytes = len(pickle.dumps(inputs[0]))
+
+    remaining = inputs[max_workers:]
+    chunksize = get_chunksize(len(remaining), max_workers, task_seconds, payload_bytes)
+
+    results = [result for result, _ in probe]
+    results.extend(executor.map(dispatcher, remaining, chunksize=chunksize))
+
+    return results
+
+
+def _timed_dispatch(dispatcher, args):
+    """Runs a task and returns its result with its compute time."""
+    start_time = time.perf_counter()
+    result = dispatcher(args)
+    return result, time.perf_counter() - start_time
+
+
+def iter_tasks_local(inputs, dispatcher, max_workers:int, notifier,
+                     max_in_flight:int=None, blas_threads:int=DEFAULT_BLAS_THREADS):
+    """
+    Generator variant of run_tasks_local. Yields the result of every
+    task as soon as it completes, while keeping at most max_in_flight
+    tasks submitted to the pool.
+
+    Parameters
+    ----------
+    inputs : iterable of tuples
+        Arguments to be passed to the dispatcher function. Inputs are
+        consumed lazily, so a generator can be passed.
+    dispatcher : callable
+        The dispatcher function that will handle each task.
+    max_workers : int
+        Maximum number of workers to use in the ProcessPoolExecutor.
+    notifier : object
+        Notifier object to manage notifications and state.
+    max_in_flight : int, optional
+        Maximum number of submitted tasks whose results have not been
+        yielded yet, by default 2 * max_workers.
+    blas_threads : int, optional
+        Cap the BLAS threads of every worker, so workers x BLAS threads
+        matches the sizing of get_process_limit, by default
+        DEFAULT_BLAS_THREADS (1). None leaves the workers uncapped.
+
+    Yields
+    ------
+    index : int
+        Position of the task in inputs.
+    yhat : ndarray
+        Prediction outcome of the task.
+    yhat_details : dict
+        Detailed model results of the task.
+    """
+    
+    
+    if max_in_flight is None:
+        max_in_flight = 2 * max_workers
+
+    # Get the current notifier state and disable the notifier
+    n_state = notifier.get_notifier_status()
+    notifier.disable_notifier()
+
+    try:
+        with _process_pool(max_workers, blas_threads) as executor:
+            tasks = enumerate(inputs)
+            in_flight = {}
+
+            # Keep the in-flight window full and yield in completion order
+            for index, args in tasks:
+                in_flight[executor.submit(dispatcher, args)] = index
+                if len(in_flight) < max_in_flight:
+                    continue
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    yield in_flight.pop(future), result[0], result[1]
+
+            # Drain the remaining tasks
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    yield in_flight.pop(future), result[0], result[1]
+    finally:
+        # Restore notifier state
+        notifier.set_notifier_status(n_state)
+
+
+def run_tasks_api(inputs, dispatcher, get_results_dispatcher, max_workers:int, notifier,
+                  timeout:float=POLL_TIMEOUT):
     """
     Generic function to run parallel tasks using the 
     provided dispatcher for CSA API calls.
@@ -66,9 +281,12 @@ def run_tasks_api(inputs, dispatcher, get_results_dispatcher, max_workers:int, n
     get_results_dispatcher : callabale
         The dispatcher function that will retrieve results from the API.
     max_workers : int
-        Maximum number of workers to use in the ProcessPoolExecutor.
+        Maximum number of workers to use in the thread pools.
     notifier : object
         Notifier object to manage notifications and state.
+    timeout : float, optional
+        Global deadline (in seconds) for collecting the results,
+        by default POLL_TIMEOUT (15 minutes).
 
     Returns
     -------
@@ -89,72 +307,14 @@ def run_tasks_api(inputs, dispatcher, get_results_dispatcher, max_workers:int, n
 
     # Unpack job_id and job_code using list comprehension
     job_id, job_code = zip(*jobs)
-    
- 
-    # Set timeout to 15 minutes (15 * 60 seconds)
-    TIMEOUT = 15 * 60  # 15 minutes in seconds
 
     inputs_for_get = [
         (job_id[q], job_code[q]) for q in range(len(jobs))
     ]
 
-    # Create boolean array to track processing jobs.
-    processing_jobs = [True] * len(inputs_for_get)
-
-    completed_results = [None] * len(inputs_for_get)
-
-    failed_jobs = 0
-
-    # Track the start time
-    start_time = time.time()
-
-    while True in processing_jobs:
-        # Dispatch the get_results task in a multi-threaded pool
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
-            # Update the inputs
-            active_indices = [i for i in range(len(inputs_for_get)) if processing_jobs[i] == True]
-
-            # Submit tasks to the executor
-            future_to_index = {executor.submit(get_results_dispatcher, inputs_for_get[i]): i for i in active_indices}
-            
-            for future in future_to_index:
-                index = future_to_index[future]
-                try:
-                    # Wait for the result with a timeout
-                    result = future.result(timeout=TIMEOUT)
-
-                    detail_keys = result[1].keys()
-
-                    # If a yhat is returned or an error is reported mark as completed
-                    if result[0] is not None or 'error' in detail_keys:  
-                        # Update job to completed
-                        processing_jobs[index] = False
-                        # Save completed result
-                        completed_results[index] = result
-                        
-                        # increment failed jobs tracker
-                        if 'error' in detail_keys:
-                            failed_jobs += 1
-
-                except TimeoutError:
-                    print(f"Job {index} timed out after {TIMEOUT / 60} minutes.")
-                    processing_jobs[index] = False
-                    completed_results[index] = None
-                except Exception as e:
-                    print(f"Error processing job {index}: {str(e)}")
-                    # Optionally handle other errors here
-                    processing_jobs[index] = False
-                    completed_results[index] = None
-            
-                # Print status after each iteration
-                get_results_progress(processing_jobs=processing_jobs, failed_jobs=failed_jobs)
-
-        # Check if the total passes timeout cutoff
-        if time.time() - start_time > TIMEOUT:
-            print("\n15 minutes have passed. Exiting.")
-            break
-    
-    print("\n")
+    # Poll the results in completion order with per-job backoff
+    completed_results = poll_results(inputs_for_get, get_results_dispatcher,
+                                     max_workers=max_workers, timeout=timeout)
 
     # restore notifier state
     _notifier.set_notifier_status(n_state)
@@ -166,4 +326,83 @@ def run_tasks_api(inputs, dispatcher, get_results_dispatcher, max_workers:int, n
     yhat_details = [result[1] for result in completed_results]
 
     # Return results
-    return yhat, yhat_details
\ No newline at end of file
+    return yhat, yhat_details
+
+
+def iter_tasks_api(inputs, dispatcher, get_results_dispatcher, max_workers:int, notifier,
+                   timeout:float=POLL_TIMEOUT):
+    """
+    Generator variant of run_tasks_api. Submits every task to the CSA
+    API, then yields the result of every task as soon as it has been
+    retrieved.
+
+    Parameters
+    ----------
+    inputs : list of tuples
+        List of arguments to be passed to the dispatcher function.
+    dispatcher : callable
+        The dispatcher function that will handle each task.
+    get_results_dispatcher : callabale
+        The dispatcher function that will retrieve results from the API.
+    max_workers : int
+        Maximum number of workers to use in the thread pools.
+    notifier : object
+        Notifier object to manage notifications and state.
+    timeout : float, optional
+        Global deadline (in seconds) for collecting the results,
+        by default POLL_TIMEOUT (15 minutes).
+
+    Yields
+    ------
+    index : int
+        Position of the task in inputs.
+    yhat : ndarray or None
+        Prediction outcome of the task, None if the task failed.
+    yhat_details : dict
+        Detailed model results of the task.
+    """
+    
+    
+    # Get the current notifier state and disable the notifier
+    n_state = notifier.get_notifier_status()
+    notifier.disable_notifier()
+
+    try:
+        # Execute tasks in multi-threaded pool
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            jobs = list(executor.map(dispatcher, inputs))
+
+        # Yield the results in completion order
+        for index, result in iter_poll_results(jobs, get_results_dispatcher,
+                                               max_workers=max_workers, timeout=timeout):
+            yield index, result[0], result[1]
+    finally:
+        # restore notifier state
+        notifier.set_notifier_status(n_state)
+
+
+def _bench_dispatcher(args):
+    """Benchmark task: a small least-squares prediction."""
+    q, y, X = args
+    weights = np.linalg.lstsq(X, y, rcond=None)[0]
+    return X[q:q+1] @ weights, {'weights': weights}
+
+
+if __name__ == "__main__":
+
+    # Benchmark: per-task IPC versus adaptive chunking at different Q and N
+    rng = np.random.default_rng(0)
+
+    for N in (50, 500):
+        X = rng.standard_normal((N, 5))
+        y = rng.standard_normal((N, 1))
+
+        for Q in (1_000, 10_000):
+            inputs = [(q % N, y, X) for q in range(Q)]
+
+            for chunksize in (1, 'auto'):
+                start_time = time.perf_counter()
+                run_tasks_local(inputs, _bench_dispatcher, 4, _notifier, chunksize=chunksize)
+                elapsed = time.perf_counter() - start_time
+
+                print(f"N={N}, Q={Q}, chunksize={chunksize}: {Q / elapsed:,.0f} tasks/s")
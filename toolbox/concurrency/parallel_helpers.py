@@ -1,16 +1,32 @@
 # Standard library imports
-import os # To get the number of available CPU cores
 import threading # For creating and managing threads
+from collections.abc import Sequence # Base class of lazy task slices
 
 # Third-party library imports
 import numpy as np # For numerical computations and array operations
 
 # Local application-specific imports
+from csa_common_lib.enum_types.job_types import JobType # Prediction task types
 from csa_common_lib.toolbox._validate import _validate_ndarray # For validation of ndarray inputs
+from csa_common_lib.toolbox.concurrency.shared_arrays import resolve_shared # For shared memory inputs
+from csa_common_lib.toolbox.concurrency.worker_sizing import DEFAULT_BLAS_THREADS, get_worker_limit # For topology-aware sizing
 
 
-def get_process_limit():
-    """Get the process limits based on the CPU power.
+def get_process_limit(*arrays, blas_threads:int=DEFAULT_BLAS_THREADS):
+    """Get the process limits based on the usable CPUs (affinity and
+    cgroup quota), BLAS threads per worker and available memory. The
+    limit can be overridden with the CSA_PROCESS_LIMIT environment
+    variable.
+
+    Parameters
+    ----------
+    *arrays : ndarray, optional
+        Inputs of a task (e.g. X, y, theta), used to estimate the
+        memory of each worker.
+    blas_threads : int, optional
+        BLAS threads per worker, by default DEFAULT_BLAS_THREADS (1),
+        the cap run_tasks_local and iter_tasks_local apply to their
+        workers.
 
     Returns
     -------
@@ -18,20 +34,55 @@ def get_process_limit():
     The process limit
     """    
 
-    # Initialize the default number of threads
-    max_threads = 1
-    
-    # Get the number of CPUs hyper threads available
-    num_cpus = os.cpu_count()
-    
-    # Set the number of maximum threads available
-    # Allow 2 cores for OS and main application.
-    max_threads = max(1, min(num_cpus - 2, 10))
-    
-    # Return
-    return max_threads    
+    # Allow 2 cores for OS and main application, and at most 10 workers.
+    return get_worker_limit(*arrays, blas_threads=blas_threads,
+                            reserved_cpus=2, max_workers=10)
     
 
+def get_chunksize(num_tasks:int, max_workers:int, task_seconds:float,
+                  payload_bytes:int, target_seconds:float=0.05,
+                  max_chunk_bytes:int=64 * 2**20, min_chunks_per_worker:int=4):
+    """Get the number of tasks to send to a worker per IPC round trip,
+    based on the measured per-task latency and payload size.
+
+    Parameters
+    ----------
+    num_tasks : int
+        Number of tasks to schedule.
+    max_workers : int
+        Number of worker processes.
+    task_seconds : float
+        Measured compute time of a single task, in seconds.
+    payload_bytes : int
+        Pickled size of the arguments of a single task, in bytes.
+    target_seconds : float, optional
+        Compute time a chunk should amortize its IPC round trip over,
+        by default 0.05.
+    max_chunk_bytes : int, optional
+        Upper bound of the pickled size of a chunk, by default 64 MiB.
+    min_chunks_per_worker : int, optional
+        Minimum number of chunks per worker, to keep the load balanced,
+        by default 4.
+
+    Returns
+    -------
+    int
+        The chunk size
+    """
+
+
+    # Enough tasks per chunk to amortize the round trip
+    by_latency = int(np.ceil(target_seconds / max(task_seconds, 1e-6)))
+
+    # Keep every worker busy with several chunks
+    by_balance = int(np.ceil(num_tasks / (max_workers * min_chunks_per_worker)))
+
+    # Bound the size of the pickled chunk
+    by_payload = max_chunk_bytes // max(payload_bytes, 1)
+
+    return max(1, min(by_latency, by_balance, by_payload))
+
+
 def thread_safe_print(message: str, print_lock:threading.Lock):
     """
     Thread-safe print function.
@@ -64,12 +115,14 @@ def slice_matrices(q:int, slice_type:str, y_matrix, theta_matrix, X):
         Slice type, either "y" or "theta". Indicates whether the 
         asynchronous parent will be iterating over Q-prediction tasks
         stratifying y or theta (not both).
-    y_matrix : ndarray
+    y_matrix : ndarray or SharedArrayHandle
         Column vector or matrix of dependent variable(s).
-    theta_matrix : ndarray
+    theta_matrix : ndarray or SharedArrayHandle
         Row vector or matrix of circumstances.
-    X : ndarray
-        Matrix of independent variables
+    X : ndarray or SharedArrayHandle
+        Matrix of independent variables. X is neither sliced nor
+        returned: dispatchers that receive a shared X resolve it
+        themselves with resolve_shared(X).
 
     Returns
     -------
@@ -78,6 +131,11 @@ def slice_matrices(q:int, slice_type:str, y_matrix, theta_matrix, X):
     ndarray [1-by-K]
         Row vector of circumstances (theta).
 
+    Examples
+    --------
+    >>> y, theta = slice_matrices(q, 'y', y_matrix, theta_matrix, X)
+    >>> X = resolve_shared(X)  # zero-copy view if X is a SharedArrayHandle
+
     Raises
     ------
     ValueError
@@ -89,6 +147,10 @@ def slice_matrices(q:int, slice_type:str, y_matrix, theta_matrix, X):
     # Initialize output variables
     y = None
     theta = None
+
+    # Resolve shared memory handles into zero-copy views
+    y_matrix = resolve_shared(y_matrix)
+    theta_matrix = resolve_shared(theta_matrix)
     
     match slice_type.lower():
         case "y":
@@ -118,6 +180,138 @@ def slice_matrices(q:int, slice_type:str, y_matrix, theta_matrix, X):
     # Return y column vector and a theta row vector
     return y, theta
 
+def slice_matrices_batch(y_matrix, theta_matrix, job_type:JobType):
+    """Batch variant of slice_matrices. Validates the shapes of y_matrix
+    and theta_matrix once and returns a lazy sequence of the (y, theta)
+    inputs of every prediction task.
+
+    Parameters
+    ----------
+    y_matrix : ndarray or SharedArrayHandle
+        Column vector [N-by-1] or matrix [N-by-Q] of dependent variable(s).
+    theta_matrix : ndarray or SharedArrayHandle
+        Row vector [1-by-K] or matrix [Q-by-K] of circumstances.
+    job_type : JobType
+        Prediction task type. MULTI_Y iterates over the columns of
+        y_matrix, MULTI_THETA over the rows of theta_matrix, and SINGLE
+        yields a single task.
+
+    Returns
+    -------
+    TaskSlices
+        Sequence of (y, theta) tuples, where y is an [N-by-1] column
+        vector and theta a [1-by-K] row vector, both zero-copy views.
+
+    Raises
+    ------
+    ValueError
+        If the dimensions of y_matrix or theta_matrix do not match
+        the job type.
+    """
+
+
+    # Resolve shared memory handles into zero-copy views
+    y_matrix = np.atleast_2d(resolve_shared(y_matrix))
+    theta_matrix = np.atleast_2d(resolve_shared(theta_matrix))
+
+    match job_type:
+        case JobType.MULTI_Y:
+            num_tasks = y_matrix.shape[1]
+            if theta_matrix.shape[0] != 1:
+                raise ValueError("psrlib_async:slice_matrices_batch:Theta argument must be a row vector for multi_y jobs.")
+
+        case JobType.MULTI_THETA:
+            num_tasks = theta_matrix.shape[0]
+            if y_matrix.shape[1] != 1:
+                raise ValueError("psrlib_async:slice_matrices_batch:y argument must be a column vector for multi_theta jobs.")
+
+        case JobType.SINGLE:
+            num_tasks = 1
+            if theta_matrix.shape[0] != 1 or y_matrix.shape[1] != 1:
+                raise ValueError("psrlib_async:slice_matrices_batch:Single jobs expect a y column vector and a theta row vector.")
+
+        case _:
+            raise ValueError("psrlib_async:slice_matrices_batch:Invalid job_type")
+
+    return TaskSlices(y_matrix, theta_matrix, job_type, num_tasks)
+
+
+class TaskSlices(Sequence):
+    """Lazy sequence of the (y, theta) inputs of Q prediction tasks,
+    returned by slice_matrices_batch. Items are zero-copy views of the
+    validated y_matrix and theta_matrix.
+
+    Parameters
+    ----------
+    y_matrix : ndarray
+        Validated [N-by-1] or [N-by-Q] matrix of dependent variable(s).
+    theta_matrix : ndarray
+        Validated [1-by-K] or [Q-by-K] matrix of circumstances.
+    job_type : JobType
+        Prediction task type.
+    num_tasks : int
+        Number of prediction tasks Q.
+    """
+
+    def __init__(self, y_matrix, theta_matrix, job_type:JobType, num_tasks:int):
+        self.y_matrix = y_matrix
+        self.theta_matrix = theta_matrix
+        self.job_type = job_type
+        self.num_tasks = num_tasks
+
+
+    def __len__(self):
+        return self.num_tasks
+
+
+    def __getitem__(self, q):
+        if isinstance(q, slice):
+            return [self[i] for i in range(*q.indices(self.num_tasks))]
+
+        if q < 0:
+            q += self.num_tasks
+        if not 0 <= q < self.num_tasks:
+            raise IndexError("psrlib_async:TaskSlices:Task index out of range")
+
+        # Basic slicing keeps the 2d shapes and returns views
+        if self.job_type == JobType.MULTI_Y:
+            return self.y_matrix[:, q:q+1], self.theta_matrix
+        if self.job_type == JobType.MULTI_THETA:
+            return self.y_matrix, self.theta_matrix[q:q+1]
+        return self.y_matrix, self.theta_matrix
+
+
+    def chunks(self, chunk_size:int):
+        """Splits the tasks into contiguous blocks, e.g. to ship one block
+        of tasks to a worker at a time.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Number of tasks per block.
+
+        Yields
+        ------
+        start : int
+            Index of the first task of the block.
+        y_block : ndarray
+            [N-by-1] column vector, or [N-by-chunk] contiguous block of
+            y columns for multi_y jobs.
+        theta_block : ndarray
+            [1-by-K] row vector, or [chunk-by-K] contiguous block of
+            theta rows for multi_theta jobs.
+        """
+        for start in range(0, self.num_tasks, chunk_size):
+            stop = min(start + chunk_size, self.num_tasks)
+
+            if self.job_type == JobType.MULTI_Y:
+                yield start, np.ascontiguousarray(self.y_matrix[:, start:stop]), self.theta_matrix
+            elif self.job_type == JobType.MULTI_THETA:
+                yield start, self.y_matrix, np.ascontiguousarray(self.theta_matrix[start:stop])
+            else:
+                yield start, self.y_matrix, self.theta_matrix
+
+
 def get_results_progress(processing_jobs, failed_jobs:int):
         """Progress printout of get-jobs results collection.
 
@@ -0,0 +1,281 @@
+
+# Standard library imports
+import heapq # Priority queue of jobs ordered by their next poll time
+import random # Jitter for the polling backoff
+import time # Monotonic clock for deadlines and backoff
+
+# Local application / library-specific imports
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from csa_common_lib.toolbox.concurrency.parallel_helpers import get_results_progress
+
+
+# Default global deadline for collecting results (15 minutes in seconds)
+POLL_TIMEOUT = 15 * 60
+
+# Default backoff schedule (in seconds) between two polls of the same job
+POLL_INITIAL_DELAY = 0.5
+POLL_MAX_DELAY = 30.0
+POLL_BACKOFF = 2.0
+POLL_JITTER = 0.25
+
+# Minimum time (in seconds) between two progress printouts
+PROGRESS_INTERVAL = 0.25
+
+
+def poll_results(inputs_for_get, get_results_dispatcher, max_workers:int,
+                 timeout:float=POLL_TIMEOUT, initial_delay:float=POLL_INITIAL_DELAY,
+                 max_delay:float=POLL_MAX_DELAY, backoff:float=POLL_BACKOFF,
+                 jitter:float=POLL_JITTER, show_progress:bool=True):
+    """Collects the results of submitted API jobs.
+
+    A single long-lived thread pool polls the jobs and results are
+    handled in completion order, so a slow job never blocks the
+    others. A job that is still processing is polled again after an
+    exponentially growing, jittered delay.
+
+    Parameters
+    ----------
+    inputs_for_get : list of tuples
+        List of (job_id, job_code) arguments, one per submitted job.
+    get_results_dispatcher : callable
+        The dispatcher function that will retrieve results from the API.
+        It must return a (yhat, details) tuple, where yhat is None
+        while the job is still processing.
+    max_workers : int
+        Maximum number of concurrent polling requests.
+    timeout : float, optional
+        Global deadline (in seconds) for collecting all results,
+        by default POLL_TIMEOUT (15 minutes).
+    initial_delay : float, optional
+        Delay (in seconds) before the second poll of a job,
+        by default POLL_INITIAL_DELAY.
+    max_delay : float, optional
+        Upper bound (in seconds) of the delay between two polls
+        of the same job, by default POLL_MAX_DELAY.
+    backoff : float, optional
+        Multiplier applied to the delay after every unfinished poll,
+        by default POLL_BACKOFF.
+    jitter : float, optional
+        Relative jitter applied to every delay, i.e. a delay d is drawn
+        uniformly from [d * (1 - jitter), d * (1 + jitter)],
+        by default POLL_JITTER.
+    show_progress : bool, optional
+        Print the collection progress, by default True.
+
+    Returns
+    -------
+    list of tuples
+        List of (yhat, details) results in the order of inputs_for_get.
+        Jobs that failed or did not complete before the deadline have
+        a None yhat and an 'error' key in their details.
+    """
+
+
+    completed_results = [None] * len(inputs_for_get)
+
+    for index, result in iter_poll_results(
+        inputs_for_get, get_results_dispatcher, max_workers, timeout=timeout,
+        initial_delay=initial_delay, max_delay=max_delay, backoff=backoff,
+        jitter=jitter, show_progress=show_progress
+    ):
+        completed_results[index] = result
+
+    return completed_results
+
+
+def iter_poll_results(inputs_for_get, get_results_dispatcher, max_workers:int,
+                      timeout:float=POLL_TIMEOUT, initial_delay:float=POLL_INITIAL_DELAY,
+                      max_delay:float=POLL_MAX_DELAY, backoff:float=POLL_BACKOFF,
+                      jitter:float=POLL_JITTER, show_progress:bool=True):
+    """Polling scheduler behind poll_results. Yields (index, result)
+    tuples as soon as each job completes, jobs that time out are
+    yielded last. See poll_results for the description of the
+    parameters.
+    """
+
+
+    num_jobs = len(inputs_for_get)
+    deadline = time.monotonic() + timeout
+
+    # Track the state of every job
+    processing_jobs = [True] * num_jobs
+    attempts = [0] * num_jobs
+    failed_jobs = 0
+    last_progress = 0.0
+
+    # Jobs waiting for their next poll, ordered by due time
+    pending = [(0.0, q) for q in range(num_jobs)]
+    heapq.heapify(pending)
+
+    # Polls currently running in the pool
+    in_flight = {}
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while pending or in_flight:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            # Submit every job that is due, without exceeding the pool size
+            while pending and pending[0][0] <= now and len(in_flight) < max_workers:
+                _, index = heapq.heappop(pending)
+                future = executor.submit(get_results_dispatcher, inputs_for_get[index])
+                in_flight[future] = index
+
+            # Sleep until a poll completes, the next job is due, or the deadline
+            wait_time = deadline - now
+            if pending and len(in_flight) < max_workers:
+                wait_time = min(wait_time, pending[0][0] - now)
+            wait_time = max(wait_time, 0.0)
+
+            if not in_flight:
+                time.sleep(wait_time)
+                continue
+
+            done, _ = wait(in_flight, timeout=wait_time, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = (None, {'error': f"Error processing job {index}: {str(e)}"})
+
+                # If a yhat is returned or an error is reported mark as completed
+                if result[0] is not None or 'error' in result[1]:
+                    processing_jobs[index] = False
+                    if 'error' in result[1]:
+                        failed_jobs += 1
+                    yield index, result
+                else:
+                    # Still processing, poll again after a backoff delay
+                    attempts[index] += 1
+                    delay = _backoff_delay(attempts[index], initial_delay,
+                                           max_delay, backoff, jitter)
+                    heapq.heappush(pending, (time.monotonic() + delay, index))
+
+            # Print status, throttled to keep large batches cheap
+            if show_progress and (time.monotonic() - last_progress > PROGRESS_INTERVAL):
+                get_results_progress(processing_jobs=processing_jobs, failed_jobs=failed_jobs)
+                last_progress = time.monotonic()
+    finally:
+        # Do not wait for polls that are still running past the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Report every job that did not complete before the deadline
+    timed_out = [index for index in range(num_jobs) if processing_jobs[index]]
+    if timed_out:
+        print(f"\n{len(timed_out)} job(s) timed out after {timeout / 60:g} minutes.")
+
+    for index in timed_out:
+        processing_jobs[index] = False
+        failed_jobs += 1
+        yield index, (None, {'error': f"Job {index} timed out after {timeout / 60:g} minutes."})
+
+    if show_progress:
+        get_results_progress(processing_jobs=processing_jobs, failed_jobs=failed_jobs)
+        print("\n")
+
+
+def _backoff_delay(attempt:int, initial_delay:float, max_delay:float,
+                   backoff:float, jitter:float):
+    """Computes the jittered exponential backoff delay before the next
+    poll of a job.
+
+    Parameters
+    ----------
+    attempt : int
+        Number of polls that found the job still processing.
+    initial_delay : float
+        Delay (in seconds) after the first unfinished poll.
+    max_delay : float
+        Upper bound (in seconds) of the delay before jitter.
+    backoff : float
+        Multiplier applied to the delay after every unfinished poll.
+    jitter : float
+        Relative jitter applied to the delay.
+
+    Returns
+    -------
+    float
+        Delay in seconds.
+    """
+
+
+    delay = min(max_delay, initial_delay * backoff ** (attempt - 1))
+    return delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+class StandInJobServer:
+    """Local stand-in for the CSA API job server. Jobs complete after
+    a random processing latency, which allows polling schedulers to be
+    exercised and benchmarked without network access.
+
+    Parameters
+    ----------
+    min_latency : float, optional
+        Minimum processing time (in seconds) of a job, by default 0.0.
+    max_latency : float, optional
+        Maximum processing time (in seconds) of a job, by default 1.0.
+    request_latency : float, optional
+        Round-trip time (in seconds) of every request, by default 0.0.
+    failure_rate : float, optional
+        Ratio of jobs that complete with an error, by default 0.0.
+    seed : int, optional
+        Seed of the latency generator, by default None.
+    """
+
+    def __init__(self, min_latency:float=0.0, max_latency:float=1.0,
+                 request_latency:float=0.0, failure_rate:float=0.0, seed:int=None):
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.request_latency = request_latency
+        self.failure_rate = failure_rate
+        self.num_requests = 0
+        self._random = random.Random(seed)
+        self._jobs = {}
+
+
+    def post_job(self, inputs):
+        """Dispatcher that submits a job. Returns a (job_id, job_code) tuple.
+        """
+        time.sleep(self.request_latency)
+
+        job_id = len(self._jobs)
+        latency = self._random.uniform(self.min_latency, self.max_latency)
+        is_failed = self._random.random() < self.failure_rate
+        self._jobs[job_id] = (time.monotonic() + latency, is_failed, inputs)
+
+        return job_id, f'standin-{job_id}'
+
+
+    def get_results(self, job):
+        """Dispatcher that retrieves the (yhat, details) results of a job.
+        yhat is None while the job is still processing.
+        """
+        time.sleep(self.request_latency)
+        self.num_requests += 1
+
+        job_id, job_code = job
+        ready_time, is_failed, _ = self._jobs[job_id]
+
+        if time.monotonic() < ready_time:
+            return None, {'job_code': job_code}
+        if is_failed:
+            return None, {'job_code': job_code, 'error': 'Stand-in job failed.'}
+        return [[float(job_id)]], {'job_code': job_code}
+
+
+if __name__ == "__main__":
+
+    # Benchmark: collect 10k stand-in jobs
+    num_jobs = 10_000
+    server = StandInJobServer(max_latency=5.0, request_latency=0.001, seed=0)
+    jobs = [server.post_job(q) for q in range(num_jobs)]
+
+    start_time = time.perf_counter()
+    results = poll_results(jobs, server.get_results, max_workers=32)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"Collected {num_jobs} jobs in {elapsed:.2f}s with {server.num_requests} polls.")
@@ -0,0 +1,305 @@
+
+# Standard library imports
+import os # To detect shared blocks released by their publisher
+from collections import OrderedDict # LRU of arrays attached in a worker
+from multiprocessing import shared_memory # Zero-copy transport between processes
+
+# Third-party library imports
+import numpy as np # For numerical computations and array operations
+
+
+# Maximum number of shared blocks a process keeps attached
+MAX_ATTACHED = 16
+
+# Maximum size of the shared blocks a process keeps attached, in bytes
+# (the most recently used block is always kept)
+MAX_ATTACHED_BYTES = 1 << 30
+
+# Directory of the POSIX shared memory blocks (Linux), None elsewhere
+SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Arrays smaller than this (in bytes) are cheaper to pickle than to share
+MIN_SHARED_BYTES = 1 << 20
+
+# Shared blocks attached by this process, by block name
+_attached = OrderedDict()
+
+# Evicted blocks that could not be closed yet (views still alive)
+_retired = []
+
+
+class SharedArrayHandle:
+    """Lightweight, picklable reference to an ndarray published in
+    shared memory. Handles are passed to worker processes instead of
+    the arrays themselves and resolved into zero-copy views with
+    resolve_shared.
+
+    Parameters
+    ----------
+    name : str
+        Name of the shared memory block.
+    shape : tuple
+        Shape of the published array.
+    dtype : str
+        Data type of the published array.
+    """
+
+    def __init__(self, name:str, shape:tuple, dtype:str):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = dtype
+
+
+    @property
+    def nbytes(self):
+        """Size of the published array in bytes."""
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+
+    def resolve(self):
+        """Returns a read-only view of the published array.
+
+        Returns
+        -------
+        ndarray
+            Zero-copy view of the shared array.
+        """
+        return _attach(self)
+
+
+    def __repr__(self):
+        return f"SharedArrayHandle(name='{self.name}', shape={self.shape}, dtype='{self.dtype}')"
+
+
+class SharedArrays:
+    """Publishes ndarrays to shared memory once and hands out
+    SharedArrayHandle objects for them. Used as a context manager,
+    the shared blocks are released on exit.
+
+    Parameters
+    ----------
+    **arrays : ndarray
+        Arrays to publish, by name.
+
+    Examples
+    --------
+    >>> with SharedArrays(X=X, y=y_matrix) as handles:
+    ...     inputs = [(q, handles['y'], handles['X']) for q in range(Q)]
+    ...     run_tasks_local(inputs, dispatcher, max_workers, notifier)
+    """
+
+    def __init__(self, **arrays):
+        self._blocks = {}
+        self.handles = {}
+
+        for key, array in arrays.items():
+            self.handles[key] = self.publish(array)
+
+
+    def publish(self, array):
+        """Copies an array into a new shared memory block.
+
+        Parameters
+        ----------
+        array : ndarray
+            Array to publish.
+
+        Returns
+        -------
+        SharedArrayHandle
+            Handle to the published array.
+        """
+        array = np.asarray(array)
+        if array.dtype.hasobject:
+            raise ValueError("shared_arrays:publish:Object arrays cannot be shared.")
+
+        # Shared memory blocks cannot be empty
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        shared[...] = array
+        del shared
+
+        self._blocks[block.name] = block
+        return SharedArrayHandle(block.name, array.shape, array.dtype.str)
+
+
+    def release(self):
+        """Closes and unlinks every published block."""
+        for name, block in self._blocks.items():
+            # Drop the views this process attached to the block
+            _detach(name)
+            block.close()
+            block.unlink()
+        self._blocks = {}
+
+
+    def __enter__(self):
+        return self.handles
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def share_inputs(inputs, min_bytes:int=MIN_SHARED_BYTES):
+    """Replaces large ndarrays in a list of task arguments by shared
+    memory handles. Arrays passed to several tasks (e.g. the same X
+    for every task) are published only once.
+
+    Parameters
+    ----------
+    inputs : list of tuples
+        List of arguments to be passed to the dispatcher function.
+    min_bytes : int, optional
+        Arrays smaller than min_bytes are left in place,
+        by default MIN_SHARED_BYTES (1 MiB).
+
+    Returns
+    -------
+    shared_inputs : list of tuples
+        Task arguments with large arrays replaced by handles.
+    publisher : SharedArrays
+        Owner of the shared blocks, release it once the tasks are done.
+    """
+
+
+    publisher = SharedArrays()
+    handles = {} # handle by array identity
+
+    def _share(arg):
+        if (isinstance(arg, np.ndarray) and arg.nbytes >= min_bytes
+                and not arg.dtype.hasobject):
+            if id(arg) not in handles:
+                handles[id(arg)] = publisher.publish(arg)
+            return handles[id(arg)]
+        return arg
+
+    shared_inputs = [
+        tuple(_share(arg) for arg in args) if isinstance(args, tuple) else _share(args)
+        for args in inputs
+    ]
+
+    return shared_inputs, publisher
+
+
+def resolve_shared(obj):
+    """Resolves a SharedArrayHandle into a zero-copy ndarray view.
+    Any other object is returned as is.
+
+    Parameters
+    ----------
+    obj : SharedArrayHandle or any
+        Object to resolve.
+
+    Returns
+    -------
+    ndarray or any
+        Read-only view of the shared array, or obj.
+    """
+    if isinstance(obj, SharedArrayHandle):
+        return _attach(obj)
+    return obj
+
+
+def _attach(handle:SharedArrayHandle):
+    """Attaches to a shared block (once per process) and returns a
+    read-only view of its array.
+    """
+
+
+    if handle.name in _attached:
+        _attached.move_to_end(handle.name)
+        return _attached[handle.name][1]
+
+    # A new block (e.g. the X of a new batch in a warm worker): drop the
+    # blocks whose publisher has released them, they stay resident while mapped
+    for name in [name for name in _attached if _is_released(name)]:
+        _detach(name)
+
+    block = shared_memory.SharedMemory(name=handle.name)
+    array = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=block.buf)
+    array.flags.writeable = False
+    _attached[handle.name] = (block, array)
+
+    # Bound the number and size of the blocks kept attached (e.g. in warm workers)
+    while len(_attached) > 1 and (
+        len(_attached) > MAX_ATTACHED
+        or sum(entry[0].size for entry in _attached.values()) > MAX_ATTACHED_BYTES
+    ):
+        _detach(next(iter(_attached)))
+
+    return array
+
+
+def _is_released(name:str):
+    """Checks whether a shared block was unlinked by its publisher. Only
+    detectable where blocks are files of SHM_DIR (Linux), elsewhere the
+    blocks are only bounded by MAX_ATTACHED and MAX_ATTACHED_BYTES."""
+    if SHM_DIR is None:
+        return False
+    return not os.path.exists(os.path.join(SHM_DIR, name.lstrip('/')))
+
+
+def _detach(name:str):
+    """Drops the cached view of a shared block and closes it when no
+    other view of the block is alive.
+    """
+
+
+    entry = _attached.pop(name, None)
+    if entry is not None:
+        _retired.append(entry[0])
+        del entry
+
+    for block in list(_retired):
+        try:
+            block.close()
+            _retired.remove(block)
+        except BufferError:
+            # Views of the block are still referenced, retry later
+            pass
+
+
+def _sum_task(args):
+    """Benchmark task: reduce the shared X matrix."""
+    q, X = args
+    return resolve_shared(X).sum()
+
+
+if __name__ == "__main__":
+    import pickle
+    import resource
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Benchmark: pickled X versus shared X as the number of tasks Q grows
+    X = np.random.default_rng(0).standard_normal((20_000, 50))
+
+    for Q in (10, 100, 1_000):
+        inputs = [(q, X) for q in range(Q)]
+
+        start_time = time.perf_counter()
+        pickled_bytes = sum(len(pickle.dumps(args)) for args in inputs)
+        pickle_time = time.perf_counter() - start_time
+
+        shared, publisher = share_inputs(inputs)
+        start_time = time.perf_counter()
+        shared_bytes = sum(len(pickle.dumps(args)) for args in shared)
+        shared_time = time.perf_counter() - start_time
+
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            start_time = time.perf_counter()
+            list(executor.map(_sum_task, inputs))
+            pickled_run_time = time.perf_counter() - start_time
+
+        with publisher, ProcessPoolExecutor(max_workers=4) as executor:
+            start_time = time.perf_counter()
+            list(executor.map(_sum_task, shared))
+            shared_run_time = time.perf_counter() - start_time
+
+        print(f"Q={Q}: pickled {pickled_bytes / 1e6:.1f} MB in {pickle_time:.3f}s "
+              f"(run {pickled_run_time:.3f}s), shared {shared_bytes / 1e3:.1f} kB "
+              f"in {shared_time:.4f}s (run {shared_run_time:.3f}s)")
+
+    max_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(f"Peak worker RSS: {max_rss / 1e3:.1f} MB")
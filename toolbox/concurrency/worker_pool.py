@@ -0,0 +1,147 @@
+
+# Standard library imports
+import atexit # To shut the pool down with the interpreter
+import importlib # To pre-import modules in the workers
+import threading # To guard the module-level pool
+
+# Local application / library-specific imports
+from concurrent.futures import ProcessPoolExecutor  # For parallel processing
+from csa_common_lib.toolbox.concurrency.shared_arrays import resolve_shared
+from csa_common_lib.toolbox.concurrency.worker_sizing import limit_blas_threads
+
+
+# Modules every worker imports at start-up
+DEFAULT_PRELOAD_MODULES = ('numpy',)
+
+# Module-level warm pool, created lazily by get_worker_pool
+_pool = None
+_pool_config = None
+_pool_modules = ()
+_pool_lock = threading.Lock()
+
+# Arrays preloaded in a worker by preload_shared, by name
+_preloaded = {}
+
+
+def get_worker_pool(max_workers:int, preload_modules=(), initializer=None, initargs=(),
+                    blas_threads:int=None):
+    """Returns the module-level warm worker pool, creating it on first
+    use. The pool is reused across calls, so batches do not pay for
+    interpreter start-up and imports again. It is recreated only when
+    the requested configuration changes, or when its workers did not
+    import all of the requested preload_modules.
+
+    Parameters
+    ----------
+    max_workers : int
+        Number of worker processes.
+    preload_modules : iterable of str, optional
+        Modules to import in every worker at start-up (e.g. the module
+        of the dispatcher), in addition to DEFAULT_PRELOAD_MODULES.
+    initializer : callable, optional
+        Function run in every worker after the imports, e.g.
+        preload_shared, by default None.
+    initargs : tuple, optional
+        Arguments passed to initializer, by default ().
+    blas_threads : int, optional
+        Cap the BLAS threads of every worker (see limit_blas_threads),
+        by default None (no cap).
+
+    Returns
+    -------
+    ProcessPoolExecutor
+        The warm worker pool. Do not shut it down directly, use
+        shutdown().
+    """
+
+
+    global _pool, _pool_config, _pool_modules
+
+    config = (max_workers, initializer, tuple(initargs), blas_threads)
+    modules = tuple(dict.fromkeys(DEFAULT_PRELOAD_MODULES + tuple(preload_modules)))
+
+    with _pool_lock:
+        if _pool is not None and (_pool_config != config or not set(modules) <= set(_pool_modules)):
+            _pool.shutdown(wait=True)
+            _pool = None
+
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_warm_worker,
+                initargs=(modules, initializer, tuple(initargs), blas_threads)
+            )
+            _pool_config = config
+            _pool_modules = modules
+
+        return _pool
+
+
+def shutdown(wait:bool=True):
+    """Shuts the warm worker pool down. The next call to get_worker_pool
+    creates a new pool.
+
+    Parameters
+    ----------
+    wait : bool, optional
+        Wait for the pending tasks to complete, by default True.
+    """
+
+
+    global _pool, _pool_config, _pool_modules
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait)
+            _pool = None
+            _pool_config = None
+            _pool_modules = ()
+
+
+def preload_shared(handles:dict):
+    """Worker initializer that attaches shared arrays (e.g. the shared
+    X matrix) once per worker. Retrieve them with get_preloaded.
+
+    Parameters
+    ----------
+    handles : dict
+        SharedArrayHandle objects (or arrays), by name.
+    """
+    for key, handle in handles.items():
+        _preloaded[key] = resolve_shared(handle)
+
+
+def get_preloaded(key:str, default=None):
+    """Returns an array preloaded in the current worker by preload_shared.
+
+    Parameters
+    ----------
+    key : str
+        Name of the preloaded array.
+    default : any, optional
+        Value returned if the array was not preloaded, by default None.
+
+    Returns
+    -------
+    ndarray or any
+        The preloaded array, or default.
+    """
+    return _preloaded.get(key, default)
+
+
+def _warm_worker(modules:tuple, initializer, initargs:tuple, blas_threads:int):
+    """Worker initializer: caps the BLAS threads, pre-imports modules,
+    then runs the user initializer.
+    """
+    if blas_threads is not None:
+        limit_blas_threads(blas_threads)
+
+    for module in modules:
+        importlib.import_module(module)
+
+    if initializer is not None:
+        initializer(*initargs)
+
+
+# Release the worker processes with the interpreter
+atexit.register(shutdown)
@@ -0,0 +1,225 @@
+
+# Standard library imports
+import os # To read CPU affinity, cgroup limits and environment variables
+
+# Conditionally import threadpoolctl to cap the BLAS threads of a running process
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+
+# Environment variable overriding the computed process limit
+PROCESS_LIMIT_ENV = 'CSA_PROCESS_LIMIT'
+
+# Environment variables read by the BLAS / OpenMP runtimes
+BLAS_THREAD_ENVS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+
+# BLAS threads per worker assumed when sizing the pools, and applied to
+# the workers of run_tasks_local / iter_tasks_local
+DEFAULT_BLAS_THREADS = 1
+
+# Resident memory of an idle worker (interpreter, numpy), in bytes
+WORKER_BASE_MEMORY = 150 * 2**20
+
+# Working memory of a task as a multiple of its input size
+TASK_MEMORY_FACTOR = 3
+
+# Ratio of the available memory the workers may use
+MEMORY_HEADROOM = 0.80
+
+
+def get_available_cpus():
+    """Get the number of CPUs this process may run on, taking the CPU
+    affinity mask and the cgroup (v1 or v2) CPU quota into account.
+
+    Returns
+    -------
+    int
+        Number of usable CPUs (at least 1).
+    """
+
+
+    # CPUs in the affinity mask (e.g. taskset, container cpusets)
+    if hasattr(os, 'sched_getaffinity'):
+        num_cpus = len(os.sched_getaffinity(0))
+    else:
+        num_cpus = os.cpu_count() or 1
+
+    # CPU bandwidth quota of the container
+    quota = _get_cgroup_cpu_quota()
+    if quota is not None:
+        num_cpus = min(num_cpus, max(1, int(quota)))
+
+    return max(1, num_cpus)
+
+
+def get_available_memory():
+    """Get the memory available to this process in bytes, the lower of
+    the system available memory and the cgroup (v1 or v2) memory limit
+    headroom.
+
+    Returns
+    -------
+    int or None
+        Available memory in bytes, None if it cannot be determined.
+    """
+
+
+    candidates = []
+
+    # System-wide available memory
+    meminfo = _read_text('/proc/meminfo')
+    if meminfo is not None:
+        for line in meminfo.splitlines():
+            if line.startswith('MemAvailable:'):
+                candidates.append(int(line.split()[1]) * 1024)
+                break
+
+    # cgroup v2, then cgroup v1 memory limit
+    for limit_path, usage_path in (
+        ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+        ('/sys/fs/cgroup/memory/memory.limit_in_bytes', '/sys/fs/cgroup/memory/memory.usage_in_bytes'),
+    ):
+        limit = _read_int(limit_path)
+        if limit is not None:
+            # cgroup v1 reports an unlimited group as a huge number
+            if limit < 2**60:
+                candidates.append(max(0, limit - (_read_int(usage_path) or 0)))
+            break
+
+    return min(candidates) if candidates else None
+
+
+def estimate_task_memory(*arrays):
+    """Estimate the resident memory of one worker running a prediction
+    task on the given inputs.
+
+    Parameters
+    ----------
+    *arrays : ndarray
+        Inputs of a task (e.g. X, y, theta). None values are ignored.
+
+    Returns
+    -------
+    int
+        Estimated memory per worker in bytes.
+    """
+    input_bytes = sum(getattr(array, 'nbytes', 0) for array in arrays if array is not None)
+    return WORKER_BASE_MEMORY + TASK_MEMORY_FACTOR * input_bytes
+
+
+def get_worker_limit(*arrays, blas_threads:int=DEFAULT_BLAS_THREADS, reserved_cpus:int=2,
+                     max_workers:int=10):
+    """Get the number of worker processes that fits the machine, so
+    that workers x BLAS threads does not oversubscribe the usable CPUs
+    and the workers fit in the available memory. The limit can be
+    overridden with the CSA_PROCESS_LIMIT environment variable.
+
+    Parameters
+    ----------
+    *arrays : ndarray, optional
+        Inputs of a task (e.g. X, y, theta), used to estimate the
+        memory of each worker.
+    blas_threads : int, optional
+        BLAS threads per worker, by default DEFAULT_BLAS_THREADS (1).
+        Cap the workers to the same value (see limit_blas_threads).
+    reserved_cpus : int, optional
+        CPUs left for the OS and main application, by default 2.
+    max_workers : int, optional
+        Upper bound of the limit, by default 10.
+
+    Returns
+    -------
+    int
+        The process limit
+    """
+
+
+    # Explicit override
+    env_limit = os.environ.get(PROCESS_LIMIT_ENV)
+    if env_limit:
+        try:
+            return max(1, int(env_limit))
+        except ValueError:
+            raise ValueError(f"{PROCESS_LIMIT_ENV} must be an integer, got '{env_limit}'.")
+
+    # CPU bound: leave reserved CPUs, account for BLAS threads per worker
+    num_cpus = get_available_cpus()
+    limit = max(1, (num_cpus - reserved_cpus) // max(1, blas_threads))
+
+    # Memory bound
+    available_memory = get_available_memory()
+    if available_memory is not None:
+        task_memory = estimate_task_memory(*arrays)
+        limit = min(limit, max(1, int(available_memory * MEMORY_HEADROOM // task_memory)))
+
+    return max(1, min(limit, max_workers))
+
+
+def limit_blas_threads(num_threads:int=1):
+    """Cap the number of BLAS / OpenMP threads of the current process.
+    Intended as (part of) a worker initializer: the environment
+    variables cover runtimes loaded afterwards, and threadpoolctl
+    caps runtimes that are already loaded (e.g. numpy's OpenBLAS,
+    inherited from the parent by forked workers). Without threadpoolctl,
+    runtimes loaded before the initializer runs keep their thread count.
+    Only the environment of the calling process is changed, so run it in
+    the workers rather than in the parent.
+
+    Parameters
+    ----------
+    num_threads : int, optional
+        Number of threads per process, by default 1.
+    """
+    for env in BLAS_THREAD_ENVS:
+        os.environ[env] = str(num_threads)
+
+    if threadpool_limits is not None:
+        threadpool_limits(limits=num_threads)
+
+
+def _get_cgroup_cpu_quota():
+    """Get the cgroup CPU bandwidth quota in CPUs, None if unlimited."""
+
+
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = _read_text('/sys/fs/cgroup/cpu.max')
+    if cpu_max is not None:
+        fields = cpu_max.split()
+        if len(fields) == 2 and fields[0] != 'max':
+            return int(fields[0]) / int(fields[1])
+        return None
+
+    # cgroup v1: quota of -1 means unlimited
+    for root in ('/sys/fs/cgroup/cpu', '/sys/fs/cgroup/cpu,cpuacct'):
+        quota = _read_int(f'{root}/cpu.cfs_quota_us')
+        period = _read_int(f'{root}/cpu.cfs_period_us')
+        if quota is not None and period:
+            return quota / period if quota > 0 else None
+
+    return None
+
+
+def _read_text(path:str):
+    """Reads a small text file, None if it cannot be read."""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_int(path:str):
+    """Reads an integer from a small text file, None if it cannot be read."""
+    text = _read_text(path)
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
@@ -1,5 +1,13 @@
 # Standard library imports
+import bz2
 import os
+import struct
+import time
+import zipfile
+import zlib
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 
 # Third-party imports
 import numpy as np
@@ -12,26 +20,71 @@ from csa_common_lib.toolbox.classes.utilities import (
 )
 
 
-def load_npz(file_path: str) -> dict:
+# Member codecs of save_to_npz
+NPZ_CODECS = {
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+    'none': zipfile.ZIP_STORED,
+}
+
+# Memory-map modes of load_npz. 'r+' is not supported: writing through the
+# map would change a member without updating its CRC in the zip header.
+NPZ_MMAP_MODES = ('r', 'c')
+
+
+def load_npz(file_path: str, mmap_mode: str = None, legacy_lists: bool = False):
     """
-    Loads a `.npz` file and returns its contents as a dictionary.
+    Loads a `.npz` file and returns its contents as a lazy mapping.
+
+    Arrays are only read from the archive when their key is accessed, and
+    are returned as native numpy arrays. Pickled Python objects (stored as
+    0-d object arrays, e.g. dictionaries) are returned unwrapped.
+
+    The returned mapping keeps the archive open: close it with `close()`,
+    or use it as a context manager.
 
     Parameters
     ----------
     file_path : str
         Path to the `.npz` file.
+    mmap_mode : str, optional
+        If set ('r' read-only, or 'c' copy-on-write), arrays stored
+        uncompressed in the archive are memory-mapped instead of read.
+        Compressed members and object arrays are always read. Default is None.
+    legacy_lists : bool, optional
+        If True, eagerly loads every array and converts it to (nested) Python
+        lists, returning a plain dictionary as in previous versions.
+        Default is False.
 
     Returns
     -------
-    dict
-        A dictionary containing the key-value pairs from the `.npz` file.
+    NpzContents or dict
+        A mapping containing the key-value pairs from the `.npz` file, to be
+        closed by the caller (plain dictionary if legacy_lists).
         If the file does not exist or an error occurs during loading, 
         an empty dictionary is returned.
+
+    Raises
+    ------
+    ValueError
+        If mmap_mode is not supported.
+
+    Examples
+    --------
+    >>> with load_npz('results.npz') as data:
+    ...     weights = data['weights']
     """
-    
+
+    if mmap_mode is not None and mmap_mode not in NPZ_MMAP_MODES:
+        raise ValueError(f"Unsupported mmap_mode '{mmap_mode}'. Choose from {list(NPZ_MMAP_MODES)}.")
+
     if os.path.exists(file_path):
         # Try loading the .npz file into a dictionary.
         try:
+            if not legacy_lists:
+                return NpzContents(file_path, mmap_mode=mmap_mode)
+
             with np.load(os.path.normpath(file_path), allow_pickle=True) as npz_file:
                 obj = {}
                 for key in npz_file.files:
@@ -46,9 +99,129 @@ def load_npz(file_path: str) -> dict:
         return {}
 
 
-def save_to_npz(filename: str = None, single_precision: bool = False, **data) -> str:
+class NpzContents(Mapping):
+    """
+    Read-only, lazy mapping of the arrays in a `.npz` file, returned by
+    `load_npz`. Each array is read (or memory-mapped) on first access and
+    cached. The archive stays open until `close` is called, or the mapping
+    is used as a context manager.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the `.npz` file.
+    mmap_mode : str, optional
+        Memory-map mode of the uncompressed members ('r' or 'c'), by
+        default None.
+
+    Raises
+    ------
+    ValueError
+        If mmap_mode is not supported.
+    """
+
+    def __init__(self, file_path: str, mmap_mode: str = None):
+        if mmap_mode is not None and mmap_mode not in NPZ_MMAP_MODES:
+            raise ValueError(f"Unsupported mmap_mode '{mmap_mode}'. Choose from {list(NPZ_MMAP_MODES)}.")
+
+        self.file_path = os.path.normpath(file_path)
+        self.mmap_mode = mmap_mode
+        self._npz_file = np.load(self.file_path, allow_pickle=True)
+        self._cache = {}
+
+
+    def __getitem__(self, key):
+        if key not in self._cache:
+            if key not in self._npz_file.files:
+                raise KeyError(key)
+
+            value = self._memmap(key) if self.mmap_mode else None
+            if value is None:
+                value = self._npz_file[key]
+
+            # Unwrap pickled Python objects (e.g. dictionaries)
+            if isinstance(value, np.ndarray) and value.dtype.hasobject and value.ndim == 0:
+                value = value.item()
+
+            self._cache[key] = value
+
+        return self._cache[key]
+
+
+    def __iter__(self):
+        return iter(self._npz_file.files)
+
+
+    def __len__(self):
+        return len(self._npz_file.files)
+
+
+    def __repr__(self):
+        return f"NpzContents('{self.file_path}', keys={self._npz_file.files})"
+
+
+    def close(self):
+        """Closes the archive. Arrays already accessed remain valid."""
+        self._npz_file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def _memmap(self, key):
+        """
+        Memory-maps an archive member stored without compression.
+
+        Returns
+        -------
+        np.memmap or None
+            The memory-mapped array, or None if the member is compressed,
+            holds objects, or uses an unsupported `.npy` format version.
+        """
+
+        info = self._npz_file.zip.getinfo(f'{key}.npy')
+        if info.compress_type != zipfile.ZIP_STORED:
+            return None
+
+        with open(self.file_path, 'rb') as f:
+            # Skip the zip local file header to reach the .npy data
+            f.seek(info.header_offset)
+            local_header = struct.unpack('<4s5H3L2H', f.read(30))
+            f.seek(local_header[-2] + local_header[-1], os.SEEK_CUR)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            else:
+                return None
+
+            if dtype.hasobject:
+                return None
+            offset = f.tell()
+
+        return np.memmap(self.file_path, dtype=dtype, mode=self.mmap_mode, offset=offset,
+                         shape=shape, order='F' if fortran_order else 'C')
+
+
+def save_to_npz(filename: str = None, single_precision: bool = False,
+                compression: str = 'deflate', compresslevel: int = None,
+                max_workers: int = None, append: bool = False, **data) -> str:
     """
-    Saves the given data to a compressed `.npz` file.
+    Saves the given data to a `.npz` file.
+
+    Members are serialized and compressed in parallel by a thread pool (the
+    codecs release the GIL), and every array is streamed to its compressor
+    in chunks rather than copied into one buffer. Compressed members are
+    written in order as soon as they are ready, with at most max_workers
+    members compressed ahead, so peak memory is bounded by the compressed
+    size of max_workers members rather than of the whole archive.
 
     Parameters
     ----------
@@ -56,6 +229,20 @@ def save_to_npz(filename: str = None, single_precision: bool = False, **data) ->
         The name of the file to save the data in. If not provided, defaults to None.
     single_precision : bool, optional
         If True, converts numerical data to `float32` before saving. Default is False.
+    compression : str, optional
+        Member codec, one of 'deflate' (as `np.savez_compressed`), 'bzip2',
+        'lzma' or 'none' (as `np.savez`, allows memory-mapped loads).
+        Default is 'deflate'.
+    compresslevel : int, optional
+        Compression level of the 'deflate' (0-9) or 'bzip2' (1-9) codec.
+        Default is None (codec default). zipfile writes 'lzma' members
+        with its default preset only, so a level cannot be set for it.
+    max_workers : int, optional
+        Number of compression threads. Default is None (one per member, up to
+        the number of CPUs).
+    append : bool, optional
+        If True and the file exists, adds the members to the existing archive
+        without rewriting it. Default is False.
     **data : dict
         Additional data to save, passed as keyword arguments. The names of the 
         variables are preserved as keys in the `.npz` file.
@@ -68,26 +255,176 @@ def save_to_npz(filename: str = None, single_precision: bool = False, **data) ->
     Raises
     ------
     ValueError
-        If `filename` is not provided.
+        If `filename` is not provided, the codec is not supported, a
+        compression level is given for 'lzma', or an appended key already
+        exists in the archive.
     """
     
     if not filename:
         raise ValueError("Filename must be provided to save the data.")
 
+    if compression not in NPZ_CODECS:
+        raise ValueError(f"Unsupported compression '{compression}'. Choose from {list(NPZ_CODECS)}.")
+    compress_type = NPZ_CODECS[compression]
+
+    if compresslevel is not None and compress_type == zipfile.ZIP_LZMA:
+        raise ValueError("compresslevel is not supported with 'lzma' compression.")
+
     # Ensure the filename ends with '.npz'
     if not filename.endswith(".npz"):
         filename += ".npz"
 
     # Convert user-defined class instances to dictionaries.
     for key, value in data.items():
-        if is_obj_userdefined_class(value):
+        if is_obj_userdefined_class(value) and not isinstance(value, (np.ndarray, np.generic)):
             data[key] = class_obj_to_dict(value)
 
+    mode = 'a' if append and os.path.exists(filename) else 'w'
+    with zipfile.ZipFile(filename, mode=mode, compression=compress_type,
+                         compresslevel=compresslevel, allowZip64=True) as zf:
+
+        existing_keys = [key for key in data if f'{key}.npy' in zf.NameToInfo]
+        if existing_keys:
+            raise ValueError(f"Keys {existing_keys} already exist in '{filename}'.")
+
+        if compress_type == zipfile.ZIP_STORED or len(data) == 1 or max_workers == 1:
+            # Nothing to parallelize: stream every member into the archive.
+            for key, value in data.items():
+                with zf.open(f'{key}.npy', mode='w', force_zip64=True) as member:
+                    _write_npy(member, value, single_precision)
+        else:
+            # Compress the members in parallel and append them in order,
+            # keeping at most `workers` compressed members in memory.
+            workers = max_workers or min(len(data), os.cpu_count() or 1)
+            items = iter(data.items())
+            in_flight = deque()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for key, value in items:
+                    in_flight.append(executor.submit(_compress_member, key, value, single_precision,
+                                                     compress_type, compresslevel))
+                    if len(in_flight) >= workers:
+                        _write_compressed_member(zf, *in_flight.popleft().result())
+
+                while in_flight:
+                    _write_compressed_member(zf, *in_flight.popleft().result())
+
+    return filename
+
+
+def _write_npy(fp, value, single_precision: bool):
+    """
+    Writes a value in `.npy` format to a file-like object (as `np.savez`).
+    Arrays are written in chunks of at most 16 MiB.
+    """
+
     # Convert all data to float32 before saving, if requested.
     if single_precision:
-        data = {k: convert_to_float32(v) for k, v in data.items()}
+        value = convert_to_float32(value)
+
+    np.lib.format.write_array(fp, np.asanyarray(value), allow_pickle=True)
+
+
+def _compress_member(key: str, value, single_precision: bool,
+                     compress_type: int, compresslevel: int):
+    """
+    Serializes and compresses one archive member.
+
+    Returns
+    -------
+    zinfo : zipfile.ZipInfo
+        Member entry with its sizes and CRC set.
+    chunks : list of bytes
+        Compressed data of the member.
+    """
+
+    sink = _CompressingSink(compress_type, compresslevel)
+    _write_npy(sink, value, single_precision)
+    chunks = sink.close()
+
+    zinfo = zipfile.ZipInfo(f'{key}.npy', date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = compress_type
+    zinfo.external_attr = 0o600 << 16
+    zinfo.file_size = sink.file_size
+    zinfo.compress_size = sum(len(chunk) for chunk in chunks)
+    zinfo.CRC = sink.crc
+    if compress_type == zipfile.ZIP_LZMA:
+        # The LZMA stream is terminated by an end-of-stream marker
+        zinfo.flag_bits |= 0x02
+
+    return zinfo, chunks
+
+
+def _write_compressed_member(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, chunks: list):
+    """
+    Appends an already compressed member to an open archive, with the same
+    bookkeeping as `zipfile.ZipFile.open(..., mode='w')`.
+
+    zipfile has no public API to add pre-compressed data, so this is the
+    only function relying on its internals (`fp`, `start_dir`, `_didModify`
+    besides `filelist` and `NameToInfo`). Checked with `testzip` on
+    CPython 3.9, 3.10, 3.11, 3.12 and 3.13.
+    """
+
+    zinfo.header_offset = zf.fp.tell()
+    zf.fp.write(zinfo.FileHeader())
+    for chunk in chunks:
+        zf.fp.write(chunk)
+
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf.start_dir = zf.fp.tell()
+    zf._didModify = True
+
+
+class _CompressingSink:
+    """
+    Write-only file-like object that compresses the data written to it with a
+    zip codec and tracks its CRC-32 and uncompressed size.
+    """
+
+    def __init__(self, compress_type: int, compresslevel: int = None):
+        if compress_type == zipfile.ZIP_DEFLATED:
+            level = zlib.Z_DEFAULT_COMPRESSION if compresslevel is None else compresslevel
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        elif compress_type == zipfile.ZIP_BZIP2:
+            self._compressor = bz2.BZ2Compressor(9 if compresslevel is None else compresslevel)
+        else:
+            self._compressor = zipfile.LZMACompressor()
+
+        self._chunks = []
+        self.crc = 0
+        self.file_size = 0
+
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self.file_size += len(data)
+        chunk = self._compressor.compress(data)
+        if chunk:
+            self._chunks.append(chunk)
+        return len(data)
+
+
+    def close(self):
+        """Flushes the compressor and returns the compressed chunks."""
+        self._chunks.append(self._compressor.flush())
+        return self._chunks
+
+
+if __name__ == "__main__":
+    # Benchmark: np.savez_compressed versus save_to_npz with each codec
+    rng = np.random.default_rng(0)
+    arrays = {f'array_{i}': rng.standard_normal((2_000, 500)).round(3) for i in range(8)}
+
+    start_time = time.perf_counter()
+    np.savez_compressed('bench_npz', **arrays)
+    print(f"np.savez_compressed: {time.perf_counter() - start_time:.3f}s, "
+          f"{os.path.getsize('bench_npz.npz') / 1e6:.1f} MB")
 
-    # Save the data into a compressed `.npz` file.
-    np.savez_compressed(filename, **data)
+    for codec in NPZ_CODECS:
+        start_time = time.perf_counter()
+        save_to_npz('bench_npz', compression=codec, **arrays)
+        print(f"save_to_npz ({codec}): {time.perf_counter() - start_time:.3f}s, "
+              f"{os.path.getsize('bench_npz.npz') / 1e6:.1f} MB")
 
-    return filename
\ No newline at end of file
+    os.remove('bench_npz.npz')
@@ -0,0 +1,201 @@
+
+# Standard library imports
+from collections import OrderedDict # LRU of conditioning reports
+
+# Third-party library imports
+import numpy as np # For numerical computations and array operations
+
+# Local application / library-specific imports
+from csa_common_lib.helpers._os import calc_array_checksum
+
+
+# Residual variance ratio (1 - R^2) under which a column is considered
+# a linear combination of the previous ones
+DEFAULT_COLLINEARITY_TOL = 1e-9
+
+# Maximum number of conditioning reports kept in the cache
+MAX_CACHED_REPORTS = 32
+
+# Conditioning reports by (X checksum, tol)
+_report_cache = OrderedDict()
+
+
+def check_conditioning(X:np.ndarray, tol:float=DEFAULT_COLLINEARITY_TOL, use_cache:bool=True):
+    """Checks the rank and conditioning of a matrix from its K-by-K Gram
+    matrix X'X rather than from an SVD of X, which is much cheaper when
+    X has far more rows than columns. Collinear columns are found with a
+    pivoted Cholesky factorization of the scaled Gram matrix: a column is
+    collinear when the part of it not explained by the retained columns
+    is below tol.
+
+    Forming X'X squares the condition number, so condition numbers above
+    about 1e8 are not resolved accurately (they are reported as large or
+    infinite), which is enough to flag ill-conditioned inputs.
+
+    Two ranks are reported. 'numerical_rank' is the rank of
+    np.linalg.matrix_rank (singular values above S.max() * max(N, K) * eps).
+    It is read from X'X when every singular value is clearly above that
+    tolerance, i.e. above the resolution of the Gram matrix,
+    S.max() * sqrt(max(N, K) * eps). Otherwise (rank deficient matrices,
+    or condition numbers above about 1e6) it falls back to the SVD of X.
+    'rank' and 'collinear_columns' are the stricter collinearity check
+    (1 - R^2 of a column below tol), which also flags nearly collinear
+    columns that matrix_rank treats as independent.
+
+    Parameters
+    ----------
+    X : ndarray
+        Matrix to check, [N-by-K].
+    tol : float, optional
+        Residual variance ratio (1 - R^2 of a column on the retained
+        columns) under which a column is collinear, by default
+        DEFAULT_COLLINEARITY_TOL.
+    use_cache : bool, optional
+        Reuse the report of a matrix with the same checksum, by default True.
+
+    Returns
+    -------
+    dict
+        'rank' : int, number of columns that are not collinear (1 - R^2
+        on the retained columns of at least tol).
+        'numerical_rank' : int, rank of np.linalg.matrix_rank (see above).
+        'condition_number' : float, ratio of the largest to the smallest
+        singular value of X (inf if numerical_rank is below K).
+        'collinear_columns' : list of int, indices of the columns that are
+        linear combinations of the other columns (empty if full rank).
+        'full_rank' : bool, True if no column is collinear.
+        'numerically_full_rank' : bool, True if numerical_rank is
+        min(N, K), the matrix_rank notion of full rank.
+    """
+
+    X = np.asarray(X)
+    if X.ndim != 2:
+        raise ValueError("conditioning:check_conditioning:X must be a 2d matrix.")
+
+    cache_key = None
+    if use_cache:
+        # crc32 runs at memory speed, well below the cost of the Gram matrix
+        cache_key = (calc_array_checksum(X, 'crc32'), tol)
+        if cache_key in _report_cache:
+            _report_cache.move_to_end(cache_key)
+            return dict(_report_cache[cache_key])
+
+    X = X.astype(np.float64, copy=False)
+    gram = X.T @ X
+
+    collinear_columns = _pivoted_cholesky_collinear(gram, tol)
+    rank = X.shape[1] - len(collinear_columns)
+
+    # Singular values of X are the square roots of the Gram eigenvalues
+    eigenvalues = np.linalg.eigvalsh(gram)
+    numerical_rank = _numerical_rank(eigenvalues, X)
+    if numerical_rank < X.shape[1] or eigenvalues[0] <= 0:
+        condition_number = np.inf
+    else:
+        condition_number = float(np.sqrt(eigenvalues[-1] / eigenvalues[0]))
+
+    report = {
+        'rank': int(rank),
+        'condition_number': condition_number,
+        'collinear_columns': collinear_columns,
+        'full_rank': not collinear_columns,
+        'numerical_rank': numerical_rank,
+        'numerically_full_rank': numerical_rank == min(X.shape),
+    }
+
+    if cache_key is not None:
+        _report_cache[cache_key] = report
+        while len(_report_cache) > MAX_CACHED_REPORTS:
+            _report_cache.popitem(last=False)
+
+    return dict(report)
+
+
+def clear_conditioning_cache():
+    """Clears the cache of conditioning reports."""
+    _report_cache.clear()
+
+
+def _numerical_rank(eigenvalues:np.ndarray, X:np.ndarray):
+    """Rank of np.linalg.matrix_rank from the Gram eigenvalues. The Gram
+    eigenvalues are only accurate to about max(N, K) * eps * their maximum,
+    so X is full rank when min(N, K) of them are above that resolution
+    (every singular value is then far above the matrix_rank tolerance).
+    Otherwise the singular values cannot be told apart from X'X, and the
+    rank is computed from the SVD of X."""
+
+    largest = eigenvalues[-1] if eigenvalues.size else 0.0
+    resolution = largest * max(X.shape) * np.finfo(np.float64).eps
+    resolved = int(np.count_nonzero(eigenvalues > resolution))
+
+    if largest > 0 and resolved == min(X.shape):
+        return resolved
+    return int(np.linalg.matrix_rank(X))
+
+
+def _pivoted_cholesky_collinear(gram:np.ndarray, tol:float):
+    """Runs a pivoted Cholesky factorization of the Gram matrix scaled to
+    a unit diagonal (a correlation-like matrix, so the column scales do
+    not matter) and returns the columns that are never pivoted, i.e. the
+    columns whose residual variance ratio falls below tol.
+    """
+
+    K = gram.shape[0]
+    norms = np.sqrt(np.diag(gram))
+    zero_columns = norms == 0
+    scale = np.where(zero_columns, 1.0, norms)
+    scaled = gram / scale[:, None] / scale[None, :]
+
+    # Residual variance ratio of every column given the pivoted columns
+    residual = np.where(zero_columns, 0.0, 1.0)
+    remaining = np.ones(K, dtype=bool)
+    factor = np.zeros((K, K))
+
+    for step in range(K):
+        candidates = np.where(remaining, residual, -np.inf)
+        pivot = int(np.argmax(candidates))
+        if candidates[pivot] <= tol:
+            break
+
+        column = (scaled[:, pivot] - factor[:, :step] @ factor[pivot, :step]) / np.sqrt(residual[pivot])
+        factor[:, step] = column
+        residual = residual - column ** 2
+        remaining[pivot] = False
+
+    return [int(column) for column in np.flatnonzero(remaining)]
+
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark: SVD rank (np.linalg.matrix_rank) versus the Gram matrix
+    # checks at growing N. Full rank matrices are checked from the Gram
+    # matrix alone, the collinear column is then found by both checks.
+    K = 100
+    rng = np.random.default_rng(0)
+
+    for N in (1_000, 10_000, 100_000, 500_000):
+        X = rng.standard_normal((N, K))
+
+        start_time = time.perf_counter()
+        svd_rank = np.linalg.matrix_rank(X)
+        svd_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        report = check_conditioning(X, use_cache=False)
+        gram_time = time.perf_counter() - start_time
+
+        check_conditioning(X)
+        start_time = time.perf_counter()
+        check_conditioning(X)
+        cached_time = time.perf_counter() - start_time
+
+        assert report['rank'] == report['numerical_rank'] == svd_rank, (report, svd_rank)
+
+        X[:, 7] = 2 * X[:, 3] - X[:, 50]
+        collinear = check_conditioning(X, use_cache=False)
+        assert collinear['numerical_rank'] == np.linalg.matrix_rank(X) == K - 1
+
+        print(f"N={N}: SVD {svd_time:.3f}s, Gram {gram_time:.3f}s, "
+              f"cached (checksum) {cached_time:.3f}s, rank {report['rank']}, "
+              f"collinear {collinear['collinear_columns']}")
@@ -0,0 +1,648 @@
+
+# Standard library imports
+import atexit # To release the shared blocks of the module-level provider
+import threading # To guard the provider cache
+import weakref # To memoize the checksums of X by identity
+from collections import OrderedDict, deque # LRU of the inverse covariance matrices, rolling window rows
+
+# Third-party library imports
+import numpy as np # For numerical computations and array operations
+
+# Local application / library-specific imports
+from csa_common_lib.helpers._arrays import ArrayReference
+from csa_common_lib.helpers._os import calc_array_checksum
+from csa_common_lib.toolbox.concurrency.shared_arrays import SharedArrays, resolve_shared
+
+
+# Default memory budget of the cached inverse covariance matrices, in bytes
+DEFAULT_COV_INV_BUDGET = 256 * 2**20
+
+# Maximum number of X checksums memoized by identity
+MAX_CHECKSUM_MEMO = 64
+
+# Number of rank-1 updates after which RollingCovInv re-factorizes from scratch
+DEFAULT_REFACTOR_EVERY = 250
+
+# Module-level provider, created lazily by get_cov_inv_provider
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def compute_cov_inv(X:np.ndarray, inv_method:str='gaussian'):
+    """Computes the inverse of the sample covariance matrix of X.
+
+    Parameters
+    ----------
+    X : ndarray
+        Matrix of independent variables, [N-by-K].
+    inv_method : str, optional
+        'gaussian' (default): Cholesky factorization of the covariance,
+        falling back to the pseudo-inverse if it is not positive definite.
+        'pinv': Moore-Penrose pseudo-inverse.
+
+    Returns
+    -------
+    ndarray
+        Inverse covariance matrix, [K-by-K].
+
+    Raises
+    ------
+    ValueError
+        If inv_method is not supported.
+    """
+
+    if inv_method not in INV_METHODS:
+        raise ValueError(f"covariance:compute_cov_inv:Unsupported inv_method '{inv_method}'. "
+                         f"Choose from {list(INV_METHODS)}.")
+
+    cov = np.atleast_2d(np.cov(np.asarray(X, dtype=np.float64), rowvar=False))
+    return INV_METHODS[inv_method](cov)
+
+
+def _cholesky_inverse(cov:np.ndarray):
+    """Inverts a symmetric positive definite matrix through its Cholesky
+    factor: inv(C) = inv(L)' inv(L), with C = L L'."""
+    try:
+        L_inv = np.linalg.inv(np.linalg.cholesky(cov))
+    except np.linalg.LinAlgError:
+        # Not positive definite (e.g. collinear variables)
+        return np.linalg.pinv(cov, hermitian=True)
+
+    cov_inv = L_inv.T @ L_inv
+    return (cov_inv + cov_inv.T) / 2
+
+
+def _pseudo_inverse(cov:np.ndarray):
+    return np.linalg.pinv(cov, hermitian=True)
+
+
+# Supported inversion methods, by inv_method
+INV_METHODS = {
+    'gaussian': _cholesky_inverse,
+    'pinv': _pseudo_inverse,
+}
+
+
+class CovInvReference(ArrayReference):
+    """Lightweight, picklable reference to an inverse covariance matrix
+    held by a CovInvProvider. Assign it to PredictionOptions.cov_inv
+    instead of the matrix itself: payloads then carry the reference, and
+    the matrix is resolved on access (zero-copy from shared memory in
+    worker processes when the provider shares it). JSON serialization
+    (Float32Encoder, convert_ndarray_to_list, receipts) embeds the
+    resolved matrix.
+
+    Other processes can resolve a reference only through shared memory,
+    i.e. when its provider was created with shared=True (the default)
+    and still holds the matrix.
+
+    Parameters
+    ----------
+    key : tuple
+        (X checksum, inv_method) of the matrix.
+    handle : SharedArrayHandle, optional
+        Shared memory handle of the matrix, by default None.
+    """
+
+    def __init__(self, key:tuple, handle=None):
+        self.key = tuple(key)
+        self.handle = handle
+
+
+    def resolve(self):
+        """Returns the inverse covariance matrix.
+
+        Returns
+        -------
+        ndarray
+            Inverse covariance matrix, [K-by-K].
+
+        Raises
+        ------
+        ValueError
+            If the matrix is neither shared nor cached in this process
+            (e.g. it was evicted).
+        """
+
+        if self.handle is not None:
+            try:
+                return resolve_shared(self.handle)
+            except FileNotFoundError:
+                # Shared block released by its provider
+                pass
+
+        cov_inv = get_cov_inv_provider().lookup(self.key)
+        if cov_inv is None:
+            raise ValueError(f"covariance:CovInvReference:cov_inv {self.key} is no longer available, "
+                             "compute it again with CovInvProvider.get.")
+        return cov_inv
+
+
+    def __eq__(self, other):
+        return isinstance(other, CovInvReference) and other.key == self.key
+
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+    def __repr__(self):
+        return f"CovInvReference(checksum='{self.key[0]}', inv_method='{self.key[1]}')"
+
+
+class CovInvProvider:
+    """Computes inverse covariance matrices once per X (by checksum) and
+    inv_method, and shares them across tasks and (by default) worker
+    processes through shared memory. The least recently used matrices are
+    evicted once the cache exceeds its memory budget.
+
+    The crc64 checksum of an X is memoized by identity, so repeated calls
+    with the same array do not hash it again: modify X in place between
+    calls only if its checksum is passed explicitly.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget of the cached matrices, by default
+        DEFAULT_COV_INV_BUDGET (256 MiB).
+    shared : bool, optional
+        Publish the matrices in shared memory, so references resolve
+        without copies in worker processes, by default True. With False,
+        references only resolve in the process of the provider.
+
+    Examples
+    --------
+    >>> provider = get_cov_inv_provider()
+    >>> options = PredictionOptions(cov_inv=provider.reference(X))
+    >>> options.cov_inv  # resolved on access
+    """
+
+    def __init__(self, max_bytes:int=DEFAULT_COV_INV_BUDGET, shared:bool=True):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # (cov_inv, publisher, handle) by key
+        self._total_bytes = 0
+        self._checksums = OrderedDict() # (weak reference, checksum) by id of X
+
+
+    def get(self, X:np.ndarray, inv_method:str='gaussian', checksum:str=None):
+        """Returns the inverse covariance matrix of X, computing it on
+        first use.
+
+        Parameters
+        ----------
+        X : ndarray
+            Matrix of independent variables, [N-by-K].
+        inv_method : str, optional
+            Inversion method, see compute_cov_inv, by default 'gaussian'.
+        checksum : str, optional
+            Precomputed crc64 checksum of X (see calc_array_checksum), by
+            default None (computed, or memoized by identity of X).
+
+        Returns
+        -------
+        ndarray
+            Read-only inverse covariance matrix, [K-by-K].
+        """
+        return self._entry(X, inv_method, checksum)[0]
+
+
+    def reference(self, X:np.ndarray, inv_method:str='gaussian', checksum:str=None):
+        """Returns a lazy reference to the inverse covariance matrix of X,
+        computing the matrix on first use.
+
+        Parameters
+        ----------
+        X : ndarray
+            Matrix of independent variables, [N-by-K].
+        inv_method : str, optional
+            Inversion method, see compute_cov_inv, by default 'gaussian'.
+        checksum : str, optional
+            Precomputed crc64 checksum of X (see calc_array_checksum), by
+            default None (computed, or memoized by identity of X).
+
+        Returns
+        -------
+        CovInvReference
+            Reference to assign to PredictionOptions.cov_inv.
+        """
+        cov_inv, handle, key = self._entry(X, inv_method, checksum)
+        return CovInvReference(key, handle)
+
+
+    def lookup(self, key:tuple):
+        """Returns the cached matrix of a (X checksum, inv_method) key, or
+        None if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(tuple(key))
+            if entry is None:
+                return None
+            self._entries.move_to_end(tuple(key))
+            return entry[0]
+
+
+    def clear(self):
+        """Drops every cached matrix and releases the shared blocks."""
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+
+    def stats(self):
+        """Returns the hit/miss counters and the memory used.
+
+        Returns
+        -------
+        dict
+            'hits', 'misses', 'entries' and 'bytes'.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'entries': len(self._entries), 'bytes': self._total_bytes}
+
+
+    def _entry(self, X:np.ndarray, inv_method:str, checksum:str=None):
+        """Returns (cov_inv, handle, key), computing the matrix on a miss."""
+
+        # 64-bit checksum: a collision would silently return the wrong inverse
+        if checksum is None:
+            checksum = self._checksum(X)
+        key = (checksum, inv_method)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                cov_inv, _, handle = self._entries[key]
+                return cov_inv, handle, key
+            self.misses += 1
+
+        # Compute outside the lock, so other keys are not blocked
+        cov_inv = compute_cov_inv(X, inv_method)
+
+        publisher, handle = None, None
+        if self.shared:
+            publisher = SharedArrays()
+            handle = publisher.publish(cov_inv)
+            cov_inv = resolve_shared(handle)
+        else:
+            cov_inv.flags.writeable = False
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (cov_inv, publisher, handle)
+                self._total_bytes += cov_inv.nbytes
+
+                # Evict least recently used matrices over the budget (keep the newest)
+                while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                    self._evict(next(iter(self._entries)))
+            elif publisher is not None:
+                # Computed concurrently by another thread
+                publisher.release()
+
+            cov_inv, _, handle = self._entries.get(key, (cov_inv, None, handle))
+
+        return cov_inv, handle, key
+
+
+    def _checksum(self, X:np.ndarray):
+        """Returns the crc64 checksum of X, memoized by identity."""
+
+        with self._lock:
+            entry = self._checksums.get(id(X))
+            if entry is not None and entry[0]() is X:
+                return entry[1]
+
+        checksum = calc_array_checksum(X, 'crc64')
+
+        with self._lock:
+            try:
+                self._checksums[id(X)] = (weakref.ref(X), checksum)
+            except TypeError:
+                # Not weak referenceable (e.g. a list): not memoized
+                return checksum
+            while len(self._checksums) > MAX_CHECKSUM_MEMO:
+                self._checksums.popitem(last=False)
+
+        return checksum
+
+
+    def _evict(self, key:tuple):
+        cov_inv, publisher, _ = self._entries.pop(key)
+        self._total_bytes -= cov_inv.nbytes
+        if publisher is not None:
+            publisher.release()
+
+
+def get_cov_inv_provider(max_bytes:int=None, shared:bool=None):
+    """Returns the module-level CovInvProvider, creating it on first use.
+    References created by it resolve in this process after eviction of
+    their shared block, as long as the matrix is still cached.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget, applied to the provider when given, by default None.
+    shared : bool, optional
+        Share the matrices with worker processes (the provider default),
+        applied to the provider when given, by default None.
+
+    Returns
+    -------
+    CovInvProvider
+        The module-level provider.
+    """
+
+    global _provider
+
+    with _provider_lock:
+        if _provider is None:
+            _provider = CovInvProvider()
+            atexit.register(_provider.clear)
+        if max_bytes is not None:
+            _provider.max_bytes = max_bytes
+        if shared is not None:
+            _provider.shared = shared
+        return _provider
+
+
+def resolve_cov_inv(value):
+    """Resolves a CovInvReference into its matrix. Any other value (an
+    ndarray or None) is returned as is.
+
+    Parameters
+    ----------
+    value : CovInvReference or any
+        Value of the cov_inv option.
+
+    Returns
+    -------
+    ndarray or any
+        The inverse covariance matrix, or value.
+    """
+    if isinstance(value, CovInvReference):
+        return value.resolve()
+    return value
+
+
+class RollingCovInv:
+    """Rolling (or expanding) window inverse covariance matrix, updated in
+    O(K^2) per observation instead of an O(K^3) inversion per step.
+
+    The engine keeps the window mean and the inverse of its scatter matrix
+    S = sum((x - mean)(x - mean)'). Adding or removing a row changes S by
+    a rank-1 term, applied to the inverse with the Sherman-Morrison
+    formula. Rounding errors accumulate with every update, so the inverse
+    is re-factorized from the window rows every refactor_every updates,
+    and whenever an update is numerically unsafe (e.g. while the window
+    holds K rows or fewer, or when removing a row leaves S singular).
+
+    Parameters
+    ----------
+    X : ndarray, optional
+        Initial window rows, [N-by-K], by default None.
+    window : int, optional
+        Number of rows kept: adding a row beyond it drops the oldest one.
+        By default None (expanding window, rows are only added).
+    refactor_every : int, optional
+        Number of rank-1 updates between re-factorizations, by default
+        DEFAULT_REFACTOR_EVERY.
+    inv_method : str, optional
+        Inversion method of the re-factorizations, see compute_cov_inv,
+        by default 'gaussian'.
+
+    Examples
+    --------
+    >>> engine = RollingCovInv(X[:250], window=250)
+    >>> for t in range(250, len(X)):
+    ...     engine.add(X[t])
+    ...     options = base_options.clone_with(cov_inv=engine.cov_inv)
+    """
+
+    def __init__(self, X:np.ndarray=None, window:int=None,
+                 refactor_every:int=DEFAULT_REFACTOR_EVERY, inv_method:str='gaussian'):
+
+        if window is not None and window < 2:
+            raise ValueError("covariance:RollingCovInv:window must hold at least 2 rows.")
+        if inv_method not in INV_METHODS:
+            raise ValueError(f"covariance:RollingCovInv:Unsupported inv_method '{inv_method}'. "
+                             f"Choose from {list(INV_METHODS)}.")
+
+        self.window = window
+        self.refactor_every = refactor_every
+        self.inv_method = inv_method
+        self.updates = 0 # Rank-1 updates since the last re-factorization
+        self.refactorizations = 0
+
+        self._rows = deque()
+        self._mean = None
+        self._scatter_inv = None # None until the window can be inverted
+
+        if X is not None:
+            X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+            self._rows.extend(X[-window:] if window is not None else X)
+            self.refactor()
+
+
+    def __len__(self):
+        return len(self._rows)
+
+
+    @property
+    def cov_inv(self):
+        """Inverse sample covariance matrix of the window (ddof=1, as
+        np.cov), [K-by-K]. A new array, to assign to the cov_inv option."""
+
+        if self._scatter_inv is None:
+            raise ValueError("covariance:RollingCovInv:The window needs more rows than "
+                             "columns to estimate cov_inv.")
+        return self._scatter_inv * (len(self._rows) - 1)
+
+
+    def add(self, x:np.ndarray):
+        """Adds a row to the window, dropping the oldest row once a rolling
+        window is full.
+
+        Parameters
+        ----------
+        x : ndarray
+            New observation, [K].
+        """
+
+        x = np.asarray(x, dtype=np.float64).ravel()
+        self._rows.append(x)
+        n = len(self._rows)
+
+        if self._mean is None:
+            self._mean = x.copy()
+        else:
+            # Welford update: S += (n - 1) / n * d d', with d = x - old mean
+            delta = x - self._mean
+            self._mean += delta / n
+            self._rank_one_update(delta, (n - 1) / n)
+
+        if self.window is not None and n > self.window:
+            self.remove()
+
+
+    def remove(self):
+        """Removes the oldest row of the window.
+
+        Returns
+        -------
+        ndarray
+            The removed row, [K].
+        """
+
+        if len(self._rows) < 2:
+            raise ValueError("covariance:RollingCovInv:The window must keep at least 1 row.")
+
+        x = self._rows.popleft()
+        n = len(self._rows)
+
+        # Reverse Welford update: S -= (n + 1) / n * d d', with d = x - old mean
+        delta = x - self._mean
+        self._mean -= delta / n
+        self._rank_one_update(delta, -(n + 1) / n)
+
+        return x
+
+
+    def refactor(self):
+        """Recomputes the mean and inverse scatter matrix from the window
+        rows, discarding the drift of the rank-1 updates."""
+
+        rows = np.array(self._rows)
+        n, K = rows.shape
+        self._mean = rows.mean(axis=0)
+        self.updates = 0
+        self.refactorizations += 1
+
+        if n <= K:
+            # Scatter matrix is singular: no inverse to update yet
+            self._scatter_inv = None
+            return
+
+        self._scatter_inv = compute_cov_inv(rows, self.inv_method) / (n - 1)
+
+
+    def _rank_one_update(self, delta:np.ndarray, weight:float):
+        """Applies S += weight * d d' to the inverse scatter matrix with the
+        Sherman-Morrison formula, re-factorizing when due or unsafe."""
+
+        self.updates += 1
+        if self._scatter_inv is None or self.updates >= self.refactor_every:
+            self.refactor()
+            return
+
+        u = self._scatter_inv @ delta
+        denominator = 1.0 + weight * (delta @ u)
+        if denominator <= np.sqrt(np.finfo(np.float64).eps):
+            # Update would (nearly) make S singular: cancellation is unsafe
+            self.refactor()
+            return
+
+        self._scatter_inv -= (weight / denominator) * np.outer(u, u)
+
+
+def iter_cov_inv(X:np.ndarray, window:int=None, start:int=None,
+                 refactor_every:int=DEFAULT_REFACTOR_EVERY, inv_method:str='gaussian'):
+    """Yields the inverse covariance matrix of every step of a backtest
+    that slides (or expands) a window over the rows of X, with O(K^2)
+    rank-1 updates between steps.
+
+    Parameters
+    ----------
+    X : ndarray
+        Matrix of independent variables, [N-by-K], in time order.
+    window : int, optional
+        Rolling window length, by default None (expanding window).
+    start : int, optional
+        Number of rows of the first window, by default window (or K + 1
+        for an expanding window).
+    refactor_every : int, optional
+        Number of rank-1 updates between re-factorizations, by default
+        DEFAULT_REFACTOR_EVERY.
+    inv_method : str, optional
+        Inversion method, see compute_cov_inv, by default 'gaussian'.
+
+    Yields
+    ------
+    tuple
+        (t, cov_inv): index of the last row of the window and inverse
+        covariance matrix of the window, [K-by-K].
+    """
+
+    if start is None:
+        start = window if window is not None else X.shape[1] + 1
+
+    engine = RollingCovInv(X[:start], window=window, refactor_every=refactor_every,
+                           inv_method=inv_method)
+    yield start - 1, engine.cov_inv
+
+    for t in range(start, X.shape[0]):
+        engine.add(X[t])
+        yield t, engine.cov_inv
+
+
+def _shared_sum_task(reference):
+    """Benchmark task: resolve a shared cov_inv reference in a worker."""
+    return float(reference.resolve().sum())
+
+
+if __name__ == "__main__":
+    import pickle
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Benchmark: Q tasks inverting the covariance of the same X versus one
+    # provider computation shared by every task
+    Q, N, K = 200, 20_000, 200
+    X = np.random.default_rng(0).standard_normal((N, K))
+
+    start_time = time.perf_counter()
+    for _ in range(Q):
+        np.linalg.inv(np.cov(X, rowvar=False))
+    per_task_time = time.perf_counter() - start_time
+
+    provider = CovInvProvider(shared=True)
+    start_time = time.perf_counter()
+    for _ in range(Q):
+        reference = provider.reference(X)
+    provider_time = time.perf_counter() - start_time
+
+    assert np.allclose(reference.resolve(), np.linalg.inv(np.cov(X, rowvar=False)))
+    print(f"Q={Q}: per task inversion {per_task_time:.3f}s, provider {provider_time:.3f}s, "
+          f"{provider.stats()}")
+    print(f"payload: matrix {len(pickle.dumps(reference.resolve()))} bytes, "
+          f"reference {len(pickle.dumps(reference))} bytes")
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        sums = list(executor.map(_shared_sum_task, [reference] * 4))
+    assert np.allclose(sums, reference.resolve().sum())
+    provider.clear()
+
+    # Benchmark: rolling window backtest, full inversion per step versus
+    # rank-1 updates, with the drift against the exact inverse
+    steps, window, K = 1_000, 500, 200
+    X = np.random.default_rng(1).standard_normal((window + steps, K))
+
+    start_time = time.perf_counter()
+    for t in range(window, window + steps):
+        compute_cov_inv(X[t - window + 1:t + 1])
+    full_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for t, cov_inv in iter_cov_inv(X, window=window):
+        pass
+    rolling_time = time.perf_counter() - start_time
+
+    exact = compute_cov_inv(X[-window:])
+    drift = np.abs(cov_inv - exact).max() / np.abs(exact).max()
+    assert drift < 1e-8, drift
+    print(f"{steps} steps, K={K}: full inversion {full_time:.3f}s, "
+          f"rank-1 updates {rolling_time:.3f}s, relative drift {drift:.1e}")
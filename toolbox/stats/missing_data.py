@@ -0,0 +1,222 @@
+
+# Third-party library imports
+import numpy as np # For numerical computations and array operations
+
+
+# Size of the row blocks scanned at a time, in bytes
+DEFAULT_CHUNK_BYTES = 64 * 2**20
+
+# Default ratio of missing data per column above which a column cannot be restored
+DEFAULT_MISSING_THRESHOLD = 0.80
+
+
+def count_missing(matrix:np.ndarray, chunk_rows:int=None):
+    """Counts the missing values (NaN or None) of every column of a 2d
+    matrix in a single pass over row blocks, so memory-mapped matrices
+    are never loaded whole. Integer and boolean matrices cannot hold
+    missing values and are not scanned.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        Matrix to scan.
+    chunk_rows : int, optional
+        Number of rows scanned at a time, by default None (blocks of
+        about DEFAULT_CHUNK_BYTES).
+
+    Returns
+    -------
+    numpy.ndarray
+        Number of missing values of every column.
+    """
+
+    counts = np.zeros(matrix.shape[1], dtype=np.int64)
+    if matrix.dtype.kind in 'biu':
+        return counts
+
+    for block in _iter_blocks(matrix, chunk_rows):
+        counts += _missing_mask(block).sum(axis=0)
+
+    return counts
+
+
+def has_missing(matrix:np.ndarray, chunk_rows:int=None):
+    """Checks whether a 2d matrix holds any missing value (NaN or None),
+    stopping at the first block that does.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        Matrix to scan.
+    chunk_rows : int, optional
+        Number of rows scanned at a time, by default None (blocks of
+        about DEFAULT_CHUNK_BYTES).
+
+    Returns
+    -------
+    bool
+        True if any value is missing.
+    """
+
+    if matrix.dtype.kind in 'biu':
+        return False
+
+    for block in _iter_blocks(matrix, chunk_rows):
+        # The sum propagates NaN: much cheaper than a boolean mask
+        if matrix.dtype.kind == 'f' and not np.isnan(block.sum()):
+            continue
+        if _missing_mask(block).any():
+            return True
+
+    return False
+
+
+def impute_column_means(matrix:np.ndarray, threshold:float=DEFAULT_MISSING_THRESHOLD,
+                        chunk_rows:int=None, in_place:bool=True):
+    """Replaces the missing values (NaN or None) of a 2d matrix with the
+    mean of their column, unless a column is missing more than threshold
+    of its values. Missing counts and column sums are gathered in one
+    pass over row blocks, and the values are filled block by block
+    through a mask, without full-size temporary copies.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        Matrix with missing data to restore. Object matrices (with None
+        values) are converted to float64 first.
+    threshold : float, optional
+        Missing data ratio per column, by default 0.80
+    chunk_rows : int, optional
+        Number of rows processed at a time, by default None (blocks of
+        about DEFAULT_CHUNK_BYTES).
+    in_place : bool, optional
+        Fill the matrix in place (e.g. a memory-mapped X opened in 'r+'
+        mode), by default True. Read-only matrices are copied.
+
+    Returns
+    -------
+    numpy.ndarray
+        Restored matrix, the input matrix itself when filled in place.
+
+    Raises
+    ------
+    ValueError
+        If ratio of missing data per column exceeds the tolerance threshold.
+    """
+
+    if matrix.dtype.kind in 'biu':
+        return matrix if in_place else matrix.copy()
+
+    if matrix.dtype.kind != 'f':
+        # None values become NaN (this is a copy)
+        matrix = _to_float(matrix)
+    elif not in_place or not matrix.flags.writeable:
+        matrix = np.array(matrix)
+
+    # Single pass: missing counts and sums of the present values
+    observations = matrix.shape[0]
+    counts = np.zeros(matrix.shape[1], dtype=np.int64)
+    sums = np.zeros(matrix.shape[1], dtype=np.float64)
+    for block in _iter_blocks(matrix, chunk_rows):
+        mask = np.isnan(block)
+        counts += mask.sum(axis=0)
+        sums += np.where(mask, 0, block).sum(axis=0)
+
+    # Find columns with damage that crosses threshold.
+    damage_percent = counts / observations
+    high_damage_columns = np.where(damage_percent > threshold)[0]
+    if high_damage_columns.size > 0:
+        raise ValueError(f"Columns at indices: {str(high_damage_columns)} have significant amounts of missing data")
+
+    if not counts.any():
+        return matrix
+
+    # Column means of the present values, then fill the blocks in place
+    with np.errstate(invalid='ignore', divide='ignore'):
+        column_averages = sums / (observations - counts)
+
+    for block in _iter_blocks(matrix, chunk_rows):
+        mask = np.isnan(block)
+        if mask.any():
+            block[mask] = column_averages[np.nonzero(mask)[1]]
+
+    return matrix
+
+
+def _missing_mask(block:np.ndarray):
+    """Boolean mask of the missing values (NaN or None) of a block."""
+    if block.dtype.kind == 'f':
+        return np.isnan(block)
+    return np.isnan(_to_float(block))
+
+
+def _to_float(matrix:np.ndarray):
+    """Converts an object matrix to float64, None values becoming NaN."""
+    return np.where(np.equal(matrix, None), np.nan, matrix).astype(np.float64)
+
+
+def _iter_blocks(matrix:np.ndarray, chunk_rows:int=None):
+    """Yields views of blocks of rows of a matrix."""
+    if chunk_rows is None:
+        row_bytes = max(1, matrix[:1].nbytes)
+        chunk_rows = max(1, DEFAULT_CHUNK_BYTES // row_bytes)
+
+    for start in range(0, matrix.shape[0], chunk_rows):
+        yield matrix[start:start + chunk_rows]
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+    from csa_common_lib.toolbox._validate import _check_missing_data
+
+    # Benchmark: legacy missing-data check versus the chunked scan and
+    # in-place imputation on a large float matrix with missing values
+    N, K = 500_000, 200
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((N, K))
+    X[rng.integers(0, N, 10_000), rng.integers(0, K, 10_000)] = np.nan
+
+    def _legacy_check_missing_data(matrix, threshold=0.80):
+        if np.any(matrix == None):
+            matrix = np.where(matrix == None, np.nan, matrix)
+        if np.any(np.isnan(matrix)):
+            missing_values = np.isnan(matrix)
+            damage_percent = np.sum(missing_values, axis=0) / matrix.shape[0]
+            if np.any(damage_percent > threshold):
+                raise ValueError("Columns have significant amounts of missing data")
+            return np.where(missing_values, np.nanmean(matrix, axis=0), matrix)
+        return matrix
+
+    start_time = time.perf_counter()
+    expected = _legacy_check_missing_data(X)
+    print(f"legacy: {time.perf_counter() - start_time:.3f}s")
+
+    start_time = time.perf_counter()
+    restored = _check_missing_data(X)
+    print(f"_check_missing_data (copy): {time.perf_counter() - start_time:.3f}s")
+    assert np.allclose(restored, expected)
+
+    start_time = time.perf_counter()
+    impute_column_means(X)
+    print(f"impute_column_means (in place): {time.perf_counter() - start_time:.3f}s")
+    assert np.allclose(X, expected)
+
+    start_time = time.perf_counter()
+    has_missing(X)
+    print(f"has_missing (clean matrix): {time.perf_counter() - start_time:.3f}s")
+
+    # Chunked mode on a memory-mapped X
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'X.dat')
+        X_map = np.memmap(path, dtype=np.float64, mode='w+', shape=(N, K))
+        X_map[:] = rng.standard_normal((N, K))
+        X_map[::1000, 3] = np.nan
+
+        start_time = time.perf_counter()
+        impute_column_means(X_map, chunk_rows=50_000)
+        X_map.flush()
+        print(f"impute_column_means (memmap): {time.perf_counter() - start_time:.3f}s")
+        assert not has_missing(X_map)
+        del X_map